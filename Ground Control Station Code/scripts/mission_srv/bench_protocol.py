@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: bench_protocol.py
+# Date: 10/17/2026
+# Description: Compares the legacy base64/JSON detection protocol with the
+#              binary framed one: bytes on the wire per detection and GCS
+#              CPU time to receive and decode it.
+# Version: 1.0
+###############################################################################
+import os
+import sys
+import json
+import time
+import base64
+import getopt
+import socket
+from threading import Thread
+from detection_protocol import *
+
+RCVBUF = 1024
+
+TELEMETRY_SAMPLE = {"time": 1679155200000000, "lat": 38.5382, "lon": -121.7617,
+        "alt": 120.0, "yaw": 87.5, "pitch": -2.1, "roll": 0.4, "speed": 22.3,
+        "accuracy": 91.7}
+
+
+def usage():
+    print('Usage: bench_protocol.py [<option>...]\n')
+    print('\t-i <file>\tJPEG to send (default: 400 KB of random bytes) [--input]')
+    print('\t-n <count>\tDetections per protocol [--count] (default: 50)')
+    print('\t-h\t\tPrint the help menu')
+
+
+def get_params():
+    image = None
+    count = 50
+
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "i:n:h",
+                            ["input=", "count=", "help"])
+    except getopt.GetoptError as err:
+        print(err)
+        usage()
+        sys.exit(2)
+
+    for o, a in opts:
+        if o in ("-i", "--input"):
+            image = a
+        elif o in ("-n", "--count"):
+            count = int(a)
+        elif o in ("-h", "--help"):
+            usage()
+            sys.exit()
+        else:
+            assert False, "unhandled option"
+
+    return {"input": image, "count": count}
+
+
+class CountingSocket:
+    """Wraps a socket and counts the bytes it sends and receives."""
+    def __init__(self, sock):
+        self._sock = sock
+        self.sent = 0
+        self.received = 0
+
+    def send(self, data):
+        n = self._sock.send(data)
+        self.sent += n
+        return n
+
+    def sendall(self, data):
+        self._sock.sendall(data)
+        self.sent += len(data)
+
+    def recv(self, size, flags=0):
+        data = self._sock.recv(size, flags)
+        if not flags & socket.MSG_PEEK:
+            self.received += len(data)
+        return data
+
+    def recv_into(self, buf, size=0):
+        n = self._sock.recv_into(buf, size)
+        self.received += n
+        return n
+
+
+def legacy_send(sock, uuid, image, count):
+    for _ in range(count):
+        msg = dict(TELEMETRY_SAMPLE, uuid=uuid, image={
+                'b64': base64.b64encode(image).decode('utf-8'), 'ext': 'jpg'})
+        det_json = json.dumps(msg)
+        sock.send(f'{uuid},{len(det_json)}'.encode('utf-8'))
+        sock.recv(1024)
+        sock.sendall(det_json.encode('utf-8'))
+        sock.recv(1024)
+
+
+def legacy_receive(conn, count):
+    """Same steps as mission_srv.recv_legacy and process_msg, minus the
+    file and database writes."""
+    for _ in range(count):
+        det_msg = b''
+        det = conn.recv(RCVBUF).decode('utf-8').split(',')
+        det_id = det[0]
+        det_size = int(det[1])
+        conn.send(b'NAME_SIZE')
+
+        bytes_recvd = 0
+        while bytes_recvd < det_size:
+            data = conn.recv(RCVBUF)
+            bytes_recvd += len(data)
+            det_msg += data
+
+        conn.send(det_id.encode('utf-8'))
+        msg = json.loads(det_msg.decode('utf-8'))
+        base64.b64decode(msg['image']['b64'].encode('utf'))
+
+
+def framed_send(sock, uuid, image, count):
+    send_hello(sock)
+    read_frame(sock)
+    for seq in range(1, count + 1):
+        header, payload = encode_detection(dict(TELEMETRY_SAMPLE, uuid=uuid),
+                image, seq)
+        sock.sendall(header)
+        sock.sendall(payload)
+        read_frame(sock)
+
+
+def framed_receive(conn, count):
+    """Same steps as mission_srv.recv_framed, minus the file and database
+    writes."""
+    is_framed(conn)
+    read_frame(conn)
+    send_hello(conn)
+    for _ in range(count):
+        version, kind, seq, meta, payload = read_frame(conn)
+        unpack_telemetry(meta)
+        conn.sendall(pack_header(ACK, seq))
+
+
+def run(name, sender, receiver, image, count):
+    drone, gcs = socket.socketpair()
+    drone = CountingSocket(drone)
+    gcs = CountingSocket(gcs)
+    uuid = os.urandom(16).hex()
+
+    cpu = {}
+    def timed_receive():
+        start = time.thread_time()
+        receiver(gcs, count)
+        cpu["s"] = time.thread_time() - start
+
+    rx = Thread(target=timed_receive)
+    rx.start()
+    start = time.perf_counter()
+    sender(drone, uuid, image, count)
+    rx.join()
+    wall = time.perf_counter() - start
+
+    return {"protocol": name,
+            "detections": count,
+            "image_bytes": len(image),
+            "uplink_bytes_per_det": drone.sent / count,
+            "downlink_bytes_per_det": gcs.sent / count,
+            "overhead_pct": 100.0 * (drone.sent / count - len(image)) / len(image),
+            "gcs_cpu_ms_per_det": 1000.0 * cpu["s"] / count,
+            "wall_ms_per_det": 1000.0 * wall / count}
+
+
+if __name__ == '__main__':
+    config = get_params()
+    if config["input"] is not None:
+        with open(config["input"], 'rb') as fp:
+            image = fp.read()
+    else:
+        image = os.urandom(400 * 1024)
+
+    results = [run("legacy", legacy_send, legacy_receive, image,
+                   config["count"]),
+               run("framed", framed_send, framed_receive, image,
+                   config["count"])]
+
+    for r in results:
+        print(f'{r["protocol"]:>7}: {r["uplink_bytes_per_det"]:.0f} B up '
+              f'(+{r["overhead_pct"]:.1f}% over the JPEG), '
+              f'{r["downlink_bytes_per_det"]:.0f} B down, '
+              f'GCS CPU {r["gcs_cpu_ms_per_det"]:.2f} ms/det, '
+              f'wall {r["wall_ms_per_det"]:.2f} ms/det')
+    legacy, framed = results
+    print(f'wire bytes: {framed["uplink_bytes_per_det"] / legacy["uplink_bytes_per_det"]:.2f}x, '
+          f'GCS CPU: {legacy["gcs_cpu_ms_per_det"] / framed["gcs_cpu_ms_per_det"]:.1f}x less')
+    print(json.dumps(results))
@@ -7,10 +7,14 @@ import os
 import getopt
 import base64
 import _thread
+import select
+import threading
+from collections import OrderedDict
 import psycopg2
 import logging
 import logging.handlers
 from signal_handler import SignalHandler
+from detection_protocol import *
 
 LOG_FILENAME = '/opt/firedrone/logs/mission_srv.log'
 
@@ -28,6 +32,29 @@ handler.setFormatter(formatter)
 
 RCVBUF = 1024 
 
+# Cumulative ACK at least this often while frames keep arriving
+ACK_EVERY = 4
+
+class RecentIds:
+    """Bounded set of recently stored detection uuids, shared by all
+    connections, so a detection resent after a lost ACK is stored once."""
+    def __init__(self, capacity=4096):
+        self._ids = OrderedDict()
+        self._capacity = capacity
+        self._lock = threading.Lock()
+
+    def add(self, det_id):
+        """Returns False when det_id was already seen."""
+        with self._lock:
+            if det_id in self._ids:
+                return False
+            self._ids[det_id] = None
+            if len(self._ids) > self._capacity:
+                self._ids.popitem(last=False)
+            return True
+
+recent_ids = RecentIds()
+
 signal_handler = SignalHandler()
 
 def usage():
@@ -70,7 +97,8 @@ def insert_into_database(data_dict: dict=None):
             if conn is not None:
                 conn.close()
 
-def process_msg(path:str='/tmp/out/detection', msg:dict=None):
+def process_msg(path:str='/tmp/out/detection', msg:dict=None,
+        img_data:bytes=None):
     
     tel_path = f'{path}/telemetry'
     img_path = f'{path}/imagery'
@@ -85,7 +113,7 @@ def process_msg(path:str='/tmp/out/detection', msg:dict=None):
     if msg is not None:
         tel_file = msg["uuid"]
 
-        tel_keys = ['uuid','time','lat','lon','alt','yaw','pitch','roll','speed']
+        tel_keys = ['uuid','time','lat','lon','alt','yaw','pitch','roll','speed','count']
 
         tel_dict = {key:value for key, value in msg.items() if key in tel_keys}
         tel_path = f'{tel_path}/{tel_file}'
@@ -95,7 +123,8 @@ def process_msg(path:str='/tmp/out/detection', msg:dict=None):
 
 
         img_dict = msg['image']
-        img_data = base64.b64decode(img_dict['b64'].encode('utf'))
+        if img_data is None:
+            img_data = base64.b64decode(img_dict['b64'].encode('utf'))
 
         if not os.path.exists(img_path):
             #print(f'Warning: Path {path} does not exit')
@@ -113,8 +142,85 @@ def process_msg(path:str='/tmp/out/detection', msg:dict=None):
         insert_into_database(tel_dict)
 
 
+def process_followup(path:str, msg:dict, img_data:bytes):
+    """Replaces the reduced image stored for a detection with the
+    full-resolution original."""
+    if not os.path.exists(f'{path}/telemetry/{msg["uuid"]}'):
+        # The reduced copy never arrived; store it as a new detection
+        process_msg(path, msg, img_data)
+        return
+
+    img_path = f'{path}/imagery/{msg["uuid"]}.{msg["image"]["ext"]}'
+    with open(img_path + '.tmp', 'wb') as ip:
+        ip.write(img_data)
+    os.rename(img_path + '.tmp', img_path)
+
+
 def recv_func(conn, out_dir):
 
+    try:
+        framed = is_framed(conn)
+    except (ConnectionError, OSError):
+        conn.close()
+        return
+
+    if framed:
+        recv_framed(conn, out_dir)
+    else:
+        recv_legacy(conn, out_dir)
+
+
+def recv_framed(conn, out_dir):
+
+    i = 0
+
+    try:
+        version, kind, seq, meta, payload = read_frame(conn)
+        if kind != HELLO:
+            raise ProtocolError(f'Expected HELLO, got frame type {kind}')
+        version = min(version, VERSION)
+        send_hello(conn, version)
+        mission_logger.info(f'Framed protocol v{version}')
+
+        unacked = 0
+        while signal_handler.KEEP_PROCESSING:
+            version, kind, seq, meta, payload = read_frame(conn)
+            if kind not in (DETECTION, FOLLOWUP):
+                mission_logger.debug(f'Warning: ignoring frame type {kind}')
+                continue
+
+            i += 1
+            msg = unpack_telemetry(meta)
+            msg['image'] = {'ext': 'jpg'}
+
+            if kind == FOLLOWUP:
+                mission_logger.info(f'Count: {i}\tFull resolution: {msg["uuid"]}\t{len(payload)} bytes')
+                if recent_ids.add(msg["uuid"] + '/full'):
+                    process_followup(out_dir, msg, payload)
+            else:
+                mission_logger.info(f'Count: {i}\tReceived: {msg["uuid"]}\t{len(payload)} bytes'
+                        f'\t{msg["count"]} detections')
+                if recent_ids.add(msg["uuid"]):
+                    process_msg(out_dir, msg, payload)
+                else:
+                    mission_logger.info(f'Duplicate: {msg["uuid"]} already stored')
+
+            # Frames arrive in order, so one ACK covers everything up to
+            # seq; hold it back while more frames are already waiting
+            unacked += 1
+            if unacked >= ACK_EVERY or \
+                    not select.select([conn], [], [], 0)[0]:
+                conn.sendall(pack_header(ACK, seq))
+                unacked = 0
+
+    except (ConnectionError, ProtocolError) as e:
+        mission_logger.info(f'Connection closed: {e}')
+
+    conn.close()
+
+
+def recv_legacy(conn, out_dir):
+
     i = 0
 
     while signal_handler.KEEP_PROCESSING:
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: alert_confirm.py
+# Date: 10/17/2026
+# Description: Multi-frame confirmation of alerts. A fire must be seen in
+#              K of the last N frames before an alert is raised, and
+#              repeats are suppressed for a hold-off window.
+# Version: 1.0
+# Version: 1.1 - Hits that raised an alert are not reused (10/17/2026)
+###############################################################################
+import time
+import logging
+from collections import deque
+
+cnn_logger = logging.getLogger('cnn_model')
+
+
+class AlertConfirmer:
+    def __init__(self, prob_rate=50.0, confirm=1, window=1, holdoff=0.0):
+        """prob_rate is the per-frame threshold in percent. With the
+        defaults every frame above it alerts, as before."""
+        self._prob_rate = prob_rate
+        self._confirm = max(1, confirm)
+        self._recent = deque(maxlen=max(self._confirm, window))
+        self._holdoff = holdoff
+        self._holdoff_until = 0.0
+        self._raised = 0
+        self._suppressed = 0
+
+    def observe(self, path, probability, bbox=None, model=None):
+        """Record one classified frame (probability in percent).
+
+        Returns (path, probability, bbox, model) of the frame to alert on,
+        or None.
+        """
+        hit = probability > self._prob_rate
+        self._recent.append((hit, path, probability, bbox, model))
+        if not hit:
+            return None
+
+        now = time.monotonic()
+        if now < self._holdoff_until:
+            self._suppressed += 1
+            return None
+
+        hits = [frame for frame in self._recent if frame[0]]
+        if len(hits) < self._confirm:
+            return None
+
+        # Send the clearest view of the fire from the confirming frames
+        best = max(hits, key=lambda frame: frame[2])
+        # The confirming frames are spent; the next alert needs fresh ones
+        self._recent.clear()
+        self._holdoff_until = now + self._holdoff
+        self._raised += 1
+        if self._confirm > 1 or self._holdoff > 0:
+            cnn_logger.info(f'Alert confirmed by {len(hits)} of the last '
+                    f'{self._recent.maxlen} frames, best {best[2]:.2f}% '
+                    f'({self._suppressed} repeats suppressed so far)')
+        return best[1:]
+
+    def stats(self):
+        return {"raised": self._raised, "suppressed": self._suppressed}
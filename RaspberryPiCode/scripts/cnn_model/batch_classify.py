@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: batch_classify.py
+# Date: 10/17/2026
+# Description: Offline classification of archived imagery. Work is spread
+#              over worker processes that each load the model once, and
+#              results are streamed to a JSONL or CSV file that can be
+#              resumed.
+# Version: 1.0
+# Version: 1.1 - Frames that failed are retried on resume (10/17/2026)
+###############################################################################
+import os
+import csv
+import glob
+import json
+import time
+import logging
+from multiprocessing import Pool
+from inference_session import InferenceSession
+from batcher import FrameBatcher
+
+cnn_logger = logging.getLogger('cnn_model')
+
+CSV_FIELDS = ["filename", "label", "probability", "bbox", "model", "ms"]
+
+# Per-process state set up once by _init_worker
+_batcher = None
+_results = []
+
+
+def find_images(source):
+    """All JPEGs under a directory (recursively) or matching a glob."""
+    if os.path.isdir(source):
+        files = []
+        for root, dirs, names in os.walk(source):
+            files.extend(os.path.join(root, name) for name in names
+                         if name.lower().endswith(('.jpg', '.jpeg')))
+    else:
+        files = [path for path in glob.glob(source, recursive=True)
+                 if path.lower().endswith(('.jpg', '.jpeg'))]
+    return sorted(files)
+
+def load_done(output_path):
+    """Filenames already classified in a previous run's output. Frames
+    that failed (no probability) are left out so a resume retries them.
+    A line cut short by a crash is dropped so the file can be appended to
+    cleanly."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+
+    with open(output_path, 'rb+') as fp:
+        data = fp.read()
+        end = data.rfind(b'\n') + 1
+        if end != len(data):
+            fp.truncate(end)
+            data = data[:end]
+
+    lines = data.decode('utf-8').splitlines()
+    if output_path.endswith('.csv'):
+        for row in csv.DictReader(lines):
+            if row["probability"]:
+                done.add(row["filename"])
+    else:
+        for line in lines:
+            row = json.loads(line)
+            if row["probability"] is not None:
+                done.add(row["filename"])
+    return done
+
+def _init_worker(model_path, label_path, num_threads, batch_size, tiling):
+    global _batcher
+    session = InferenceSession(model_path, label_path, num_threads)
+    _batcher = FrameBatcher(session, _collect, batch_size, tiling=tiling)
+
+def _collect(key, path, label, probability, bbox=None, model=None):
+    if probability is not None:
+        probability = float(probability)
+    _results.append({"filename": path, "label": label,
+                     "probability": probability,
+                     "bbox": list(bbox) if bbox is not None else None,
+                     "model": model})
+
+def _classify_chunk(paths):
+    del _results[:]
+    start = time.perf_counter()
+    _batcher.process([(i, path) for i, path in enumerate(paths)])
+    ms = (time.perf_counter() - start) * 1000 / len(paths)
+    for result in _results:
+        result["ms"] = round(ms, 3)
+    return list(_results)
+
+def classify_offline(source, output_path, model_path, label_path,
+        workers=None, num_threads=1, batch_size=4, tiling=None):
+    """Classify every image in source and append the results to
+    output_path (.csv for CSV, anything else for JSONL)."""
+    files = find_images(source)
+    done = load_done(output_path)
+    todo = [path for path in files if path not in done]
+    workers = workers or os.cpu_count()
+    batch_size = max(1, batch_size)
+
+    cnn_logger.info(f'Offline: {len(files)} images, {len(done)} already '
+            f'classified, {len(todo)} to go on {workers} worker(s)')
+    if not todo:
+        return 0
+
+    chunks = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+    is_csv = output_path.endswith('.csv')
+    new_file = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+
+    count = 0
+    start = time.perf_counter()
+    with open(output_path, 'a', newline='') as out, \
+            Pool(workers, _init_worker, (model_path, label_path,
+                 num_threads, batch_size, tiling)) as pool:
+        writer = csv.DictWriter(out, CSV_FIELDS) if is_csv else None
+        if writer is not None and new_file:
+            writer.writeheader()
+
+        for results in pool.imap_unordered(_classify_chunk, chunks):
+            for result in results:
+                if writer is not None:
+                    writer.writerow(result)
+                else:
+                    out.write(json.dumps(result) + '\n')
+            out.flush()
+            count += len(results)
+
+    elapsed = time.perf_counter() - start
+    cnn_logger.info(f'Offline: classified {count} images in {elapsed:.1f} s '
+            f'({count / elapsed:.1f} frames/s)')
+    return count
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: batcher.py
+# Date: 10/17/2026
+# Description: Micro-batching stage. Collects frames, preprocesses them and
+#              runs them through the inference session with a single invoke.
+# Version: 1.0
+# Version: 1.1 - Preprocess on the batcher thread, shared input queue so
+#                several batchers can act as a worker pool (10/17/2026)
+# Version: 1.2 - Preprocess into a preallocated batch buffer (10/17/2026)
+# Version: 1.3 - Buffer matches the model input dtype (10/17/2026)
+# Version: 1.4 - Optional fire-colour prefilter ahead of the CNN (10/17/2026)
+# Version: 1.5 - Reuse results for near-duplicate frames (10/17/2026)
+# Version: 1.6 - Shed queued frames when inference falls behind (10/17/2026)
+# Version: 1.7 - Tiled sliding-window mode (10/17/2026)
+# Version: 1.8 - Swap in a reloaded session between batches (10/17/2026)
+# Version: 1.9 - Prefilter screens each tile in tiled mode (10/17/2026)
+###############################################################################
+import time
+import logging
+import numpy as np
+from queue import Queue
+from queue import Empty
+from model_utils import FramePreprocessor
+from model_utils import FrameTiler
+
+cnn_logger = logging.getLogger('cnn_model')
+
+
+class FrameBatcher:
+    def __init__(self, session, on_result, batch_size=4, max_wait_ms=50.0,
+            signal_handler=None, queue=None, name='batcher', prefilter=None,
+            cache=None, skipper=None, tiling=None):
+        self._on_result = on_result
+        self._batch_size = max(1, batch_size)
+        self._max_wait = max_wait_ms / 1000
+        self._signal = signal_handler
+        self._queue = queue if queue is not None else Queue()
+        self._name = name
+        self._prefilter = prefilter
+        self._cache = cache
+        self._skipper = skipper
+        self._tiling = tiling
+        self._next_session = None
+        self._use_session(session)
+
+    def set_session(self, session):
+        """Hand over a new, already warmed session. The batcher switches to
+        it before its next batch, so no frame sees a half-swapped model."""
+        self._next_session = session
+
+    def _use_session(self, session):
+        self._session = session
+        self._tiler = None
+
+        # Reused for every batch, so steady state preprocessing allocates
+        # nothing per frame
+        self._preprocessor = FramePreprocessor(session.input_shape,
+                session.input_dtype, session.input_quantization)
+        self._buffer = np.empty((self._batch_size, *session.input_shape),
+                                dtype=self._preprocessor.dtype)
+        if self._tiling is not None:
+            overlap, max_tiles = self._tiling
+            self._tiler = FrameTiler(session.input_shape, overlap, max_tiles,
+                    session.input_dtype, session.input_quantization)
+            self._buffer = np.empty((max(1, max_tiles), *session.input_shape),
+                                    dtype=self._tiler.dtype)
+
+    def put(self, key, path):
+        self._queue.put((key, path, time.monotonic()))
+
+    def run(self):
+        while self._signal is None or self._signal.KEEP_PROCESSING:
+            batch = self.collect()
+            if batch:
+                self.process(batch)
+
+    def collect(self):
+        """Block for the first frame, then take whatever else arrives
+        until the batch is full or the latency budget is spent."""
+        batch = []
+        try:
+            self._admit(batch, self._queue.get(block=True, timeout=1))
+        except Empty:
+            return batch
+
+        deadline = time.monotonic() + self._max_wait
+        while len(batch) < self._batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                self._admit(batch, self._queue.get(block=True, timeout=remaining))
+            except Empty:
+                break
+        return batch
+
+    def _admit(self, batch, item):
+        key, path, enqueued_at = item
+        if self._skipper is not None and not self._skipper.admit(
+                enqueued_at, self._queue.empty()):
+            self._on_result(key, path, None, None)
+            return
+        batch.append((key, path))
+
+    def process(self, batch):
+        # Every key handed to the batcher gets exactly one on_result call,
+        # with None for frames that could not be classified.
+        session, self._next_session = self._next_session, None
+        if session is not None:
+            # The old session is released once nothing references it
+            self._use_session(session)
+            cnn_logger.info(f'{self._name}: switched to {session.version}')
+
+        start = time.perf_counter()
+        ready = []
+        for key, path in batch:
+            frame = self._screen(key, path)
+            if frame is None:
+                continue
+            image, scale, thumbnail = frame
+
+            if self._tiler is not None:
+                self._process_tiles(key, path, image, scale, thumbnail)
+                continue
+
+            self._preprocessor.normalize(image, self._buffer[len(ready)])
+            ready.append((key, path, thumbnail))
+        preprocess_ms = (time.perf_counter() - start) * 1000
+
+        if not ready:
+            return
+
+        results = self._classify(len(ready), start)
+
+        cnn_logger.debug(f'Timing: {self._name} batch of {len(ready)}, '
+                f'preprocess {preprocess_ms:.2f} ms, '
+                f'invoke {self._session.last_invoke_ms:.2f} ms')
+        for (key, path, thumbnail), (label, probability) in zip(ready, results):
+            self._report(key, path, thumbnail, label, probability)
+
+    def _screen(self, key, path):
+        """Decode a frame and run the cheap checks ahead of the CNN.
+
+        Returns (image, scale, thumbnail), or None once the frame has been
+        reported.
+        """
+        try:
+            if self._tiler is not None:
+                image, scale = self._tiler.decode(path)
+            else:
+                image, scale = self._preprocessor.decode(path), 1.0
+        except Exception as e:
+            cnn_logger.info(f'Warning: failed to preprocess {path}: {e}')
+            self._on_result(key, path, None, None)
+            return None
+
+        # Tiled frames are screened tile by tile in _process_tiles()
+        if self._prefilter is not None and self._tiler is None \
+                and self._prefilter.skip(image):
+            self._on_result(key, path, None, None)
+            return None
+
+        thumbnail = None
+        if self._cache is not None:
+            thumbnail = self._cache.fingerprint(image)
+            hit = self._cache.lookup(thumbnail)
+            if hit is not None:
+                label, probability, bbox, source = hit
+                cnn_logger.debug(f'Frame cache: {path} reuses {source}')
+                self._on_result(key, path, label, probability, bbox,
+                                self._session.version)
+                return None
+        return image, scale, thumbnail
+
+    def _process_tiles(self, key, path, image, scale, thumbnail):
+        """Classify the tiles of one frame in a single invoke and report
+        the most likely fire tile."""
+        start = time.perf_counter()
+        positions = self._tiler.grid(image.shape[1], image.shape[0])
+        if self._prefilter is not None:
+            kept = self._prefilter.keep_tiles(
+                    [self._tiler.crop(image, p) for p in positions])
+            if not kept:
+                self._on_result(key, path, None, None)
+                return
+            positions = [positions[i] for i in kept]
+
+        count = len(positions)
+        if count > len(self._buffer):
+            self._buffer = np.empty((count, *self._buffer.shape[1:]),
+                                    dtype=self._buffer.dtype)
+        boxes = self._tiler.fill(image, scale, self._buffer, positions)
+        results = self._classify(count, start)
+
+        probabilities = [probability for label, probability in results]
+        if probabilities[0] is None:
+            self._on_result(key, path, None, None)
+            return
+        best = int(np.argmax(probabilities))
+        label, probability = results[best]
+
+        cnn_logger.debug(f'Timing: {self._name} {count} tiles, '
+                f'invoke {self._session.last_invoke_ms:.2f} ms, '
+                f'best tile {boxes[best]}')
+        self._report(key, path, thumbnail, label, probability, boxes[best])
+
+    def _classify(self, count, start):
+        try:
+            results = self._session.classify_batch(self._buffer[:count])
+        except Exception as e:
+            cnn_logger.info(f'Warning: inference failed on {self._name}: {e}')
+            return [(None, None)] * count
+
+        frames = 1 if self._tiler is not None else count
+        if self._prefilter is not None:
+            self._prefilter.note_inference(
+                    self._session.last_invoke_ms / frames)
+        if self._skipper is not None:
+            self._skipper.note_inference(
+                    (time.perf_counter() - start) / frames)
+        return results
+
+    def _report(self, key, path, thumbnail, label, probability, bbox=None):
+        if self._cache is not None and probability is not None:
+            self._cache.store(path, thumbnail, label, probability, bbox)
+        self._on_result(key, path, label, probability, bbox,
+                        self._session.version)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: bench_preprocess.py
+# Date: 10/17/2026
+# Description: Micro-benchmark comparing preprocess_image() with the
+#              reduced-decode FramePreprocessor path (latency and peak RSS).
+# Version: 1.0
+###############################################################################
+import os
+import sys
+import glob
+import getopt
+import json
+import time
+import resource
+import subprocess
+import numpy as np
+from model_utils import preprocess_image
+from model_utils import FramePreprocessor
+
+MODES = ("legacy", "fast")
+
+
+def usage():
+    print('Usage: bench_preprocess.py [<option>...]\n')
+    print('\t-i <directory>\tDirectory of JPEG files to preprocess [--input]')
+    print('\t-r <count>\tPasses over the input directory [--repeat] (default: 5)')
+    print('\t-s <size>\tModel input size in pixels [--size] (default: 256)')
+    print('\t-m <mode>\tRun only one mode (legacy|fast) in this process [--mode]')
+    print('\t-h\t\tPrint the help menu')
+
+
+def get_params():
+    """Param function for the preprocessing benchmark."""
+    img_dir = "."
+    repeat = 5
+    size = 256
+    mode = None
+
+    try:
+        opts, args = getopt.getopt(
+                            sys.argv[1:],
+                            "i:hr:s:m:",
+                            ["input=", "help", "repeat=", "size=", "mode="])
+
+    except getopt.GetoptError as err:
+        print(err)
+        usage()
+        sys.exit(2)
+
+    for o, a in opts:
+        if o in ("-i", "--input"):
+            img_dir = a
+        elif o in ("-h", "--help"):
+            usage()
+            sys.exit()
+        elif o in ("-r", "--repeat"):
+            repeat = int(a)
+        elif o in ("-s", "--size"):
+            size = int(a)
+        elif o in ("-m", "--mode"):
+            mode = a
+        else:
+            usage()
+            assert False, "unhandled option"
+
+    return {"input": img_dir, "repeat": repeat, "size": size, "mode": mode}
+
+
+def peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def run_mode(mode, files, repeat, input_shape):
+    """Time one mode in the current process; RSS is only meaningful when
+    this is the only mode the process has run."""
+    baseline_kb = peak_rss_kb()
+
+    if mode == "legacy":
+        step = lambda path: preprocess_image(path, input_shape)
+    else:
+        preprocessor = FramePreprocessor(input_shape)
+        out = np.empty(input_shape, dtype=preprocessor.dtype)
+        step = lambda path: preprocessor.fill(path, out)
+
+    timings = []
+    for _ in range(repeat):
+        for path in files:
+            start = time.perf_counter()
+            step(path)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    timings = np.array(timings)
+    return {"mode": mode,
+            "frames": len(timings),
+            "mean_ms": float(timings.mean()),
+            "p50_ms": float(np.percentile(timings, 50)),
+            "p95_ms": float(np.percentile(timings, 95)),
+            "baseline_rss_kb": baseline_kb,
+            "peak_rss_kb": peak_rss_kb(),
+            "peak_rss_delta_kb": peak_rss_kb() - baseline_kb}
+
+
+if __name__ == '__main__':
+    config = get_params()
+    files = sorted(glob.glob(os.path.join(config["input"], '*.jp*g')))
+    input_shape = (config["size"], config["size"], 3)
+
+    if not files:
+        print(f'Warning: no JPEG files found in {config["input"]}')
+        sys.exit(1)
+
+    if config["mode"] is not None:
+        print(json.dumps(run_mode(config["mode"], files, config["repeat"],
+                                  input_shape)))
+        sys.exit()
+
+    # Each mode runs in a fresh interpreter so peak RSS is not shared
+    results = []
+    for mode in MODES:
+        out = subprocess.run([sys.executable, __file__,
+                              '-i', config["input"],
+                              '-r', str(config["repeat"]),
+                              '-s', str(config["size"]),
+                              '-m', mode],
+                             check=True, capture_output=True, text=True)
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    for r in results:
+        print(f'{r["mode"]:>7}: {r["frames"]} frames, '
+              f'mean {r["mean_ms"]:.2f} ms, p50 {r["p50_ms"]:.2f} ms, '
+              f'p95 {r["p95_ms"]:.2f} ms, '
+              f'peak RSS +{r["peak_rss_delta_kb"]} KB')
+    legacy, fast = results
+    print(f'speedup: {legacy["mean_ms"] / fast["mean_ms"]:.2f}x')
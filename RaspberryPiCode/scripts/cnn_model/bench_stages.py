@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: bench_stages.py
+# Date: 10/17/2026
+# Description: Per-stage latency benchmark for the cnn_model hot path.
+#              Reports p50/p95/p99 per stage, frames per second and peak
+#              RSS as JSON so runs can be compared across commits and Pis.
+# Version: 1.0
+###############################################################################
+import os
+import sys
+import glob
+import getopt
+import json
+import time
+import platform
+import resource
+import subprocess
+import tempfile
+import numpy as np
+import cv2
+import zmq
+import model_utils
+from model_utils import load_interpreter
+from model_utils import preprocess_image
+from model_utils import classify_image
+from model_utils import FramePreprocessor
+from inference_session import InferenceSession
+
+
+class StubInterpreter:
+    """Stand-in for the TFLite Interpreter when the production model (or
+    the runtime) is not available. It takes a 256x256x3 float input and
+    does a pooled reduction, so the numbers exercise the real data
+    movement but not the real network."""
+
+    def __init__(self, model_path=None, model_content=None, num_threads=None):
+        self._shape = np.array([1, 256, 256, 3], dtype=np.int32)
+        self._input = np.zeros(self._shape, dtype=np.float32)
+        self._output = np.zeros((1, 1), dtype=np.float32)
+
+    def allocate_tensors(self):
+        self._input = np.zeros(self._shape, dtype=np.float32)
+
+    def resize_tensor_input(self, index, shape, strict=False):
+        self._shape = np.array(shape, dtype=np.int32)
+
+    def get_input_details(self):
+        return [{"index": 0, "shape": self._shape, "dtype": np.float32,
+                 "quantization": (0.0, 0)}]
+
+    def get_output_details(self):
+        return [{"index": 1, "shape": np.array([self._shape[0], 1]),
+                 "dtype": np.float32, "quantization": (0.0, 0)}]
+
+    def set_tensor(self, index, value):
+        self._input = np.array(value, dtype=np.float32)
+
+    def invoke(self):
+        pooled = self._input.reshape(len(self._input), 32, 8, 32, 8, 3).mean(axis=(2, 4))
+        logits = pooled.mean(axis=(1, 2, 3)).reshape(-1, 1)
+        self._output = 1 / (1 + np.exp(-logits))
+
+    def get_tensor(self, index):
+        return self._output.copy()
+
+
+def usage():
+    print('Usage: bench_stages.py [<option>...]\n')
+    print('\t-i <directory>\tJPEG corpus (default: generated synthetic frames) [--input]')
+    print('\t-m <model_path>\tPath to model file; a stub is used if absent [--model]')
+    print('\t-l <label_path>\tPath to label file [--label]')
+    print('\t-r <count>\tPasses over the corpus [--repeat] (default: 3)')
+    print('\t-o <file>\tWrite the JSON report to a file [--output] (default: stdout)')
+    print('\t-h\t\tPrint the help menu')
+
+
+def get_params():
+    """Param function for the stage benchmark."""
+    img_dir = None
+    model_path = "/opt/firedrone/data/classify.tflite"
+    label_path = "/opt/firedrone/data/labels.txt"
+    repeat = 3
+    output = None
+
+    try:
+        opts, args = getopt.getopt(
+                            sys.argv[1:],
+                            "i:m:l:r:o:h",
+                            ["input=", "model=", "label=", "repeat=",
+                             "output=", "help"])
+
+    except getopt.GetoptError as err:
+        print(err)
+        usage()
+        sys.exit(2)
+
+    for o, a in opts:
+        if o in ("-i", "--input"):
+            img_dir = a
+        elif o in ("-m", "--model"):
+            model_path = a
+        elif o in ("-l", "--label"):
+            label_path = a
+        elif o in ("-r", "--repeat"):
+            repeat = int(a)
+        elif o in ("-o", "--output"):
+            output = a
+        elif o in ("-h", "--help"):
+            usage()
+            sys.exit()
+        else:
+            usage()
+            assert False, "unhandled option"
+
+    return {"input": img_dir, "model": model_path, "label": label_path,
+            "repeat": repeat, "output": output}
+
+
+def make_corpus(directory, count=16, size=(1920, 1080)):
+    """Deterministic synthetic frames: smooth gradients plus noise, so the
+    JPEGs compress like real imagery rather than pure noise."""
+    rng = np.random.default_rng(0)
+    width, height = size
+    y, x = np.mgrid[0:height, 0:width]
+    files = []
+    for i in range(count):
+        base = ((x + y * (i + 1)) % 256).astype(np.uint8)
+        frame = np.dstack([base, np.roll(base, i * 7, axis=1), base[::-1]])
+        frame = cv2.add(frame, rng.integers(0, 24, frame.shape, dtype=np.uint8))
+        path = os.path.join(directory, f'frame_{i:03d}.jpg')
+        cv2.imwrite(path, frame)
+        files.append(path)
+    return files
+
+def summarize(samples):
+    samples = np.array(samples)
+    return {"count": len(samples),
+            "mean_ms": float(samples.mean()),
+            "p50_ms": float(np.percentile(samples, 50)),
+            "p95_ms": float(np.percentile(samples, 95)),
+            "p99_ms": float(np.percentile(samples, 99))}
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+def machine_info():
+    info = {"machine": platform.machine(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count()}
+    try:
+        # Raspberry Pi board name, e.g. "Raspberry Pi 4 Model B Rev 1.4"
+        with open('/proc/device-tree/model') as fp:
+            info["board"] = fp.read().strip('\x00\n')
+    except OSError:
+        pass
+    try:
+        info["commit"] = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return info
+
+
+def run(files, model_path, label_path, repeat, stub):
+    stages = {"load_interpreter": [], "preprocess_image": [],
+              "frame_preprocessor": [], "classify_image": [],
+              "publish_alert": [], "end_to_end": []}
+
+    for _ in range(repeat):
+        interpreter, ms = timed(load_interpreter, model_path)
+        stages["load_interpreter"].append(ms)
+
+    session = InferenceSession(model_path, label_path)
+    input_shape = session.input_shape
+    preprocessor = FramePreprocessor(input_shape, session.input_dtype,
+                                     session.input_quantization)
+    buffer = np.empty((1, *input_shape), dtype=preprocessor.dtype)
+
+    # Same two calls publish_alert makes per alert
+    context = zmq.Context()
+    pub_sock = context.socket(zmq.PUB)
+    pub_sock.bind('inproc://bench_alerts')
+
+    frames = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for path in files:
+            frame_start = time.perf_counter()
+
+            image, ms = timed(preprocess_image, path, input_shape)
+            stages["preprocess_image"].append(ms)
+
+            _, ms = timed(preprocessor.fill, path, buffer[0])
+            stages["frame_preprocessor"].append(ms)
+
+            if session.input_dtype == np.float32:
+                _, ms = timed(classify_image, interpreter, image,
+                              session.labels, 0.8)
+                stages["classify_image"].append(ms)
+
+            (label, probability), invoke_ms = timed(session.classify, buffer)
+
+            msg = json.dumps({"filename": path,
+                              "accuracy": float(probability) * 100})
+            pub_start = time.perf_counter()
+            pub_sock.send_string('Alert', flags=zmq.SNDMORE)
+            pub_sock.send_json(msg)
+            stages["publish_alert"].append(
+                    (time.perf_counter() - pub_start) * 1000)
+
+            # The live worker path: fast preprocess + session invoke + publish
+            stages["end_to_end"].append(stages["frame_preprocessor"][-1]
+                    + invoke_ms + stages["publish_alert"][-1])
+            frames += 1
+    elapsed = time.perf_counter() - start
+    context.destroy(linger=0)
+
+    end_to_end_s = sum(stages["end_to_end"]) / 1000
+    return {"stages": {name: summarize(samples)
+                       for name, samples in stages.items() if samples},
+            "frames": frames,
+            "fps": frames / end_to_end_s,
+            "wall_s": elapsed,
+            "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "model": {"stub": stub, "mode": session.mode},
+            "host": machine_info()}
+
+
+if __name__ == '__main__':
+    config = get_params()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = config["model"]
+        stub = model_utils.Interpreter is None or not os.path.exists(model_path)
+        if stub:
+            model_utils.Interpreter = StubInterpreter
+            model_path = os.path.join(tmp, 'stub.tflite')
+            with open(model_path, 'wb') as fp:
+                fp.write(b'stub')
+
+        label_path = config["label"]
+        if not os.path.exists(label_path):
+            label_path = os.path.join(tmp, 'labels.txt')
+            with open(label_path, 'w') as fp:
+                fp.write('Fire\nNonFire\n')
+
+        if config["input"] is not None:
+            files = sorted(glob.glob(os.path.join(config["input"], '*.jp*g')))
+        else:
+            files = make_corpus(tmp)
+        if not files:
+            print(f'Warning: no JPEG files found in {config["input"]}')
+            sys.exit(1)
+
+        report = run(files, model_path, label_path, config["repeat"], stub)
+
+    report_json = json.dumps(report, indent=2)
+    if config["output"] is not None:
+        with open(config["output"], 'w') as fp:
+            fp.write(report_json + '\n')
+    else:
+        print(report_json)
@@ -4,26 +4,46 @@
 # Date: 03/25/2023
 # Description: CNN model used to detect fires and to trigger fire detection.
 # Version: 1.0
+# Version: 1.1 - Persistent, pre-warmed inference session (10/17/2026)
+# Version: 1.2 - Micro-batched inference mode (10/17/2026)
+# Version: 1.3 - Multi-core inference worker pool (10/17/2026)
+# Version: 1.4 - Optional fire-colour prefilter cascade (10/17/2026)
+# Version: 1.5 - Near-duplicate frame suppression cache (10/17/2026)
+# Version: 1.6 - Adaptive frame skipping under load (10/17/2026)
+# Version: 1.7 - Tiled sliding-window inference mode (10/17/2026)
+# Version: 1.8 - Offline batch classification mode (10/17/2026)
+# Version: 1.9 - Hot-swappable model reload (10/17/2026)
+# Version: 2.0 - Bounded work queue between the watcher and workers (10/17/2026)
+# Version: 2.1 - Multi-frame temporal confirmation of alerts (10/17/2026)
+# Version: 2.2 - Alerts published as soon as they are queued (10/17/2026)
+# Version: 2.3 - Frames renamed into the watched directory (10/17/2026)
 ###############################################################################
-import numpy as np
-import cv2
 import os
 import sys
 import getopt
 import random
 import base64
 import json
-import time
 import zmq
 import logging
 import logging.handlers
+from functools import partial
 from threading import Thread
 from signal_handler import SignalHandler
 from watcher import Watcher
 from watchdog.events import FileSystemEventHandler
 from queue import Queue
 from queue import Empty
-from tflite_runtime.interpreter import Interpreter
+from worker_pool import InferencePool
+from model_utils import load_labels
+from prefilter import FireColorPrefilter
+from prefilter import evaluate_prefilter
+from frame_cache import FrameCache
+from frame_skipper import FrameSkipper
+from batch_classify import classify_offline
+from model_reloader import ModelReloader
+from work_queue import OVERFLOW_POLICIES
+from alert_confirm import AlertConfirmer
 
 LOG_FILENAME = '/opt/firedrone/logs/cnn_model.log'
 
@@ -43,39 +63,49 @@ handler.setFormatter(formatter)
 signal_handler = SignalHandler()
 
 class Alert:
-    def __init__(self, filename, accuracy):
+    def __init__(self, filename, accuracy, bbox=None, model=None):
         self._filename = filename
         self._accuracy = accuracy
+        self._bbox = bbox
+        self._model = model
 
     def get_msg(self):
-        return { "filename": self._filename,
-                 "accuracy": self._accuracy }
+        msg = { "filename": self._filename,
+                "accuracy": self._accuracy }
+        if self._bbox is not None:
+            # Winning tile in tiled mode: [x, y, width, height] in pixels
+            msg["bbox"] = list(self._bbox)
+        if self._model is not None:
+            msg["model"] = self._model
+        return msg
                  
 class FileHandler(FileSystemEventHandler):
-    def __init__(self, queue, prob_rate=50.0, model_path=".", label_path="."):
-        self._queue = queue
-        self._prob_rate=prob_rate
-        self._label_path=label_path
-        self._model_path=model_path
+    """Only queues paths; all decoding and inference happens on the pool's
+    workers so a slow frame never holds up the observer thread."""
+    def __init__(self, pool):
+        self._pool = pool
 
     def on_any_event(self, event):
         if event.event_type == "created":
             path = event.src_path
-            if path.lower().endswith(('.jpg','.jpeg')):
-                if os.path.getsize(path) != 0:
-                    #probability = random.uniform(0, 100)
-                    input_shape = (256, 256, 3)
-                    threshold = 0.8
-                    labels = load_labels(self._label_path)
-                    interpreter = load_interpreter(self._model_path)
-                    image = preprocess_image(path, input_shape)
-                    label, probability = classify_image(interpreter, image, labels, threshold)
-                    probability = probability * 100
-                    #print(f'Fire Detection Probability: {probability}%')
-                    cnn_logger.info(f'Fire Detection Probability: {probability}%')
-                    if probability > self._prob_rate:
-                        self._queue.put(Alert(path, probability))              
-                        
+        elif event.event_type == "moved":
+            # The image scraper renames complete frames into place
+            path = event.dest_path
+        else:
+            return
+        if path.lower().endswith(('.jpg','.jpeg')):
+            if os.path.getsize(path) != 0:
+                self._pool.submit(path)
+
+def report_result(queue, confirmer, path, label, probability, bbox=None,
+        model=None):
+    probability = probability * 100
+    #print(f'Fire Detection Probability: {probability}%')
+    cnn_logger.info(f'Fire Detection Probability: {probability}% (model: {model})')
+    confirmed = confirmer.observe(path, probability, bbox, model)
+    if confirmed is not None:
+        queue.put(Alert(*confirmed))
+
 def publish_alert(queue, url="tcp://127.0.0.1:5556"):
 
     context  = zmq.Context()
@@ -91,7 +121,9 @@ def publish_alert(queue, url="tcp://127.0.0.1:5556"):
                 #print(f'{json.dumps(alert.get_msg())}')
                 cnn_logger.debug(f'{json.dumps(alert.get_msg())}')
         except Empty:
-            time.sleep(0.5)
+            # get() has already waited; the timeout only lets the loop
+            # notice a shutdown
+            pass
 def usage():
     print('Usage: cnn_sim [<option>...]\n')
     print('\t-w <directory>\tDirectory to watch for geotagged JPEG files [--watch]')
@@ -99,6 +131,27 @@ def usage():
     print('\t-p <probability>\tProbability limit for detections [--prob] (default: 50)')
     print('\t-m <model_path>\tPath to model file [--model]')
     print('\t-l <label_path>\tPath to label file [--label}')
+    print('\t-b <size>\tMaximum frames per inference batch [--batch] (default: 1)')
+    print('\t-t <ms>\t\tMaximum wait to fill a batch in milliseconds [--wait] (default: 50)')
+    print('\t-n <count>\tNumber of inference workers [--workers] (default: 1, offline: all cores)')
+    print('\t-j <count>\tInterpreter threads per worker [--threads] (default: runtime default)')
+    print('\t-f <percent>\tSkip the CNN below this percentage of fire-coloured pixels [--prefilter] (default: off)')
+    print('\t-e <directory>\tReport the prefilter false-negative rate on a labeled directory and exit [--prefilter-eval]')
+    print('\t-s <threshold>\tReuse results for frames within this mean grey-level difference of a recent frame [--similarity] (default: off)')
+    print('\t--cache-size <count>\tRecent frames kept for duplicate matching (default: 8)')
+    print('\t--cache-ttl <seconds>\tMaximum age of a cached frame (default: 5)')
+    print('\t-a <seconds>\tShed queued frames to keep queueing delay under this age [--max-age] (default: off)')
+    print('\t--max-stride <count>\tClassify at least every k-th frame when shedding (default: 8)')
+    print('\t--tiled\t\tClassify overlapping model-sized tiles instead of the shrunken frame')
+    print('\t--tile-overlap <fraction>\tOverlap between neighbouring tiles (default: 0.25)')
+    print('\t--max-tiles <count>\tScale the frame down so it needs at most this many tiles (default: no cap)')
+    print('\t-i <dir|glob>\tClassify archived images offline instead of watching [--input]')
+    print('\t-o <file>\tOffline results file, .jsonl or .csv; an existing file is resumed [--output] (default: results.jsonl)')
+    print('\t-q <count>\tMaximum frames waiting for a worker, 0 for unbounded [--queue-size] (default: 64)')
+    print('\t--overflow <policy>\tWhen the queue is full: drop-oldest or drop-newest (default: drop-oldest)')
+    print('\t-k <count>\tFrames above the limit needed to raise an alert [--confirm] (default: 1)')
+    print('\t--confirm-window <count>\tRecent frames the --confirm count is taken from (default: 1)')
+    print('\t--holdoff <seconds>\tSuppress repeat alerts for this long after one is raised (default: 0)')
     print('\t-h\t\tPrint the help menu')
 
 
@@ -108,14 +161,42 @@ def get_params():
     url_addr = "tcp://127.0.0.1:5556"
     model_path = "/opt/firedrone/data/classify.tflite"
     label_path = "/opt/firedrone/data/labels.txt"
+    batch_size = 1
+    max_wait = 50.0
+    workers = None
+    num_threads = None
+    prefilter = None
+    prefilter_eval = None
+    similarity = None
+    cache_size = 8
+    cache_ttl = 5.0
+    max_age = None
+    max_stride = 8
+    tiled = False
+    tile_overlap = 0.25
+    max_tiles = 0
+    offline_input = None
+    offline_output = "results.jsonl"
+    queue_size = 64
+    overflow = "drop-oldest"
+    confirm = 1
+    confirm_window = 1
+    holdoff = 0.0
     
     prob = 50
 
     try:
         opts, args = getopt.getopt(
                             sys.argv[1:],
-                            "w:h:u:p:m:l:",
-                            ["watch", "help", "url", "prob", "model","label"])
+                            "w:h:u:p:m:l:b:t:n:j:f:e:s:a:i:o:q:k:",
+                            ["watch", "help", "url", "prob", "model","label",
+                             "batch=", "wait=", "workers=", "threads=",
+                             "prefilter=", "prefilter-eval=", "similarity=",
+                             "cache-size=", "cache-ttl=", "max-age=",
+                             "max-stride=", "tiled", "tile-overlap=",
+                             "max-tiles=", "input=", "output=",
+                             "queue-size=", "overflow=", "confirm=",
+                             "confirm-window=", "holdoff="])
 
     except getopt.GetoptError as err:
         # print help information and exit:
@@ -137,41 +218,69 @@ def get_params():
             model_path = a
         elif o in ("-l", "--label"):
             label_path = a
+        elif o in ("-b", "--batch"):
+            batch_size = int(a)
+        elif o in ("-t", "--wait"):
+            max_wait = float(a)
+        elif o in ("-n", "--workers"):
+            workers = int(a)
+        elif o in ("-j", "--threads"):
+            num_threads = int(a)
+        elif o in ("-f", "--prefilter"):
+            prefilter = float(a)
+        elif o in ("-e", "--prefilter-eval"):
+            prefilter_eval = a
+        elif o in ("-s", "--similarity"):
+            similarity = float(a)
+        elif o == "--cache-size":
+            cache_size = int(a)
+        elif o == "--cache-ttl":
+            cache_ttl = float(a)
+        elif o in ("-a", "--max-age"):
+            max_age = float(a)
+        elif o == "--max-stride":
+            max_stride = int(a)
+        elif o == "--tiled":
+            tiled = True
+        elif o == "--tile-overlap":
+            tile_overlap = float(a)
+        elif o == "--max-tiles":
+            max_tiles = int(a)
+        elif o in ("-i", "--input"):
+            offline_input = a
+        elif o in ("-o", "--output"):
+            offline_output = a
+        elif o in ("-q", "--queue-size"):
+            queue_size = int(a)
+        elif o == "--overflow":
+            if a not in OVERFLOW_POLICIES:
+                print(f'Unknown overflow policy {a}')
+                usage()
+                sys.exit(2)
+            overflow = a
+        elif o in ("-k", "--confirm"):
+            confirm = int(a)
+        elif o == "--confirm-window":
+            confirm_window = int(a)
+        elif o == "--holdoff":
+            holdoff = float(a)
         else:
             usage()
             assert False, "unhandled option"
 
-    return {"watch" : watch_dir, "url" : url_addr, "prob": prob, "model" : model_path, "label" : label_path}
-
-             
-def load_labels(path):
-    with open(path, 'r') as f:
-        return [line.strip() for line in f.readlines()]
-
-def load_interpreter(path):
-    with open(path, 'rb') as f:
-        interpreter = Interpreter(model_content=f.read())
-    interpreter.allocate_tensors()
-    return interpreter
-
-def preprocess_image(image_path, input_shape):
-    image = cv2.imread(image_path)
-    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    image = cv2.resize(image, input_shape[:-1])
-    image = (image.astype(np.float32) / 127.5) - 1.0
-    image = np.expand_dims(image, 0)
-    return image
-
-def classify_image(interpreter, image, labels, threshold):
-    input_details = interpreter.get_input_details()
-    output_details = interpreter.get_output_details()
-    interpreter.set_tensor(input_details[0]['index'], image)
-    interpreter.invoke()
-    scores = interpreter.get_tensor(output_details[0]['index'])[0]
-    index = np.argmax(scores)
-    probability = 1 - scores[index]
-    label = labels[index]
-    return label, probability
+    return {"watch" : watch_dir, "url" : url_addr, "prob": prob, "model" : model_path, "label" : label_path,
+            "batch" : batch_size, "wait" : max_wait,
+            "workers" : workers, "threads" : num_threads,
+            "prefilter" : prefilter, "prefilter_eval" : prefilter_eval,
+            "similarity" : similarity, "cache_size" : cache_size,
+            "cache_ttl" : cache_ttl, "max_age" : max_age,
+            "max_stride" : max_stride, "tiled" : tiled,
+            "tile_overlap" : tile_overlap, "max_tiles" : max_tiles,
+            "input" : offline_input, "output" : offline_output,
+            "queue_size" : queue_size, "overflow" : overflow,
+            "confirm" : confirm, "confirm_window" : confirm_window,
+            "holdoff" : holdoff}
+
 
 def main():
     config = get_params()
@@ -182,13 +291,68 @@ def main():
     prob_rate = config["prob"]
     model_path = config["model"]
     label_path = config["label"]
+    batch_size = config["batch"]
+    max_wait   = config["wait"]
+    workers    = config["workers"]
+    num_threads = config["threads"]
+
+    prefilter = None
+    if config["prefilter"] is not None:
+        prefilter = FireColorPrefilter(config["prefilter"])
+
+    if config["prefilter_eval"] is not None:
+        if prefilter is None:
+            prefilter = FireColorPrefilter()
+        results = evaluate_prefilter(prefilter, config["prefilter_eval"],
+                load_labels(label_path), (256, 256, 3))
+        print(json.dumps(results, indent=2))
+        cnn_logger.info(f'Prefilter evaluation: {json.dumps(results)}')
+        sys.exit()
+
+    cache = None
+    if config["similarity"] is not None:
+        cache = FrameCache(config["similarity"], config["cache_size"],
+                config["cache_ttl"])
+
+    tiling = None
+    if config["tiled"]:
+        tiling = (config["tile_overlap"], config["max_tiles"])
     
+    if config["input"] is not None:
+        classify_offline(config["input"], config["output"], model_path,
+                label_path, workers, num_threads or 1, batch_size, tiling)
+        return
+
+    workers = workers or 1
+
+    skipper = None
+    if config["max_age"] is not None:
+        skipper = FrameSkipper(config["max_age"], config["max_stride"], workers)
+
     if not os.path.exists(watch_dir):
             #print(f'Warning: {watch_dir} does not exit!')
             cnn_logger.info(f'Warning: {watch_dir} does not exit!')
             sys.exit(1)
+
+    confirmer = AlertConfirmer(prob_rate, config["confirm"],
+            config["confirm_window"], config["holdoff"])
+
+    pool = InferencePool(model_path, label_path,
+            partial(report_result, pub_q, confirmer),
+            workers, num_threads, batch_size, max_wait, signal_handler,
+            prefilter, cache, skipper, tiling, config["queue_size"],
+            config["overflow"])
+    pool.start()
+    cnn_logger.info(f'Started {workers} inference worker(s), '
+            f'{num_threads} thread(s) each, batching up to {batch_size} '
+            f'frames within {max_wait} ms')
+
+    # Picks up a new model file or SIGHUP without restarting the service
+    reloader = ModelReloader(pool, model_path, label_path, signal_handler)
+    reload_thread = Thread(target=reloader.run)
+    reload_thread.start()
     
-    w = Watcher(watch_dir, FileHandler(pub_q, prob_rate, model_path, label_path), signal_handler)
+    w = Watcher(watch_dir, FileHandler(pool), signal_handler)
     watcher_thread = Thread(target=w.run)
     watcher_thread.start()
     
@@ -197,24 +361,16 @@ def main():
     
     watcher_thread.join()
     pub_thread.join()
-    
-    #model_path = 'classify.tflite'
-    #label_path = 'labels.txt'
-    #image_path = 'JPGs'
-    #input_shape = (256, 256, 3)
-    #threshold = 0.8
-
-    #for filename in os.listdir(image_path):
-        #f = os.path.join(image_path, filename)
-        # checking if it is a file
-        #if os.path.isfile(f):
-            #image = f
-            #print(image)
-        #labels = load_labels(label_path)
-        #interpreter = load_interpreter(model_path)
-        #image = preprocess_image(image, input_shape)
-        #label, probability = classify_image(interpreter, image, labels, threshold)
-        #print(f'The model classified the image as {label} with a probability of {probability:.2f}.')
+    pool.join()
+    reload_thread.join()
+    cnn_logger.info(f'Work queue: {json.dumps(pool.queue_stats())}')
+    cnn_logger.info(f'Alerts: {json.dumps(confirmer.stats())}')
+    if prefilter is not None:
+        prefilter.log_stats()
+    if cache is not None:
+        cache.log_stats()
+    if skipper is not None:
+        skipper.log_stats()
 
 if __name__ == '__main__':
     try:
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: frame_cache.py
+# Date: 10/17/2026
+# Description: Near-duplicate frame cache. Frames that look like a recent
+#              frame reuse its classification instead of running the CNN.
+# Version: 1.0
+# Version: 1.1 - Cache the winning tile box in tiled mode (10/17/2026)
+# Version: 1.2 - Clear on model reload (10/17/2026)
+###############################################################################
+import time
+import logging
+import numpy as np
+import cv2
+from collections import OrderedDict
+from threading import Lock
+
+cnn_logger = logging.getLogger('cnn_model')
+
+# Side length of the greyscale thumbnail used as the frame fingerprint
+THUMBNAIL_SIZE = 16
+
+# How often (in lookups) the hit/miss counters are logged
+REPORT_INTERVAL = 100
+
+
+class FrameCache:
+    def __init__(self, threshold=2.0, capacity=8, ttl=5.0):
+        """threshold is the mean absolute difference, in grey levels,
+        between two thumbnails for the frames to count as duplicates."""
+        self._threshold = threshold
+        self._capacity = max(1, capacity)
+        self._ttl = ttl
+        self._size = (THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+        self._lock = Lock()
+        # path -> (thumbnail, timestamp, label, probability, bbox), oldest first
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def fingerprint(self, image):
+        """Tiny greyscale thumbnail of a BGR uint8 frame."""
+        small = cv2.resize(image, self._size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+    def lookup(self, thumbnail):
+        """Return (label, probability, bbox, source path) of a recent
+        near-duplicate, or None."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            match = None
+            for path, (thumb, stamp, label, probability, bbox) in self._entries.items():
+                if np.abs(thumb - thumbnail).mean() <= self._threshold:
+                    match = (path, label, probability, bbox)
+                    break
+
+            if match is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._entries.move_to_end(match[0])
+            report = (self._hits + self._misses) % REPORT_INTERVAL == 0
+
+        if report:
+            self.log_stats()
+        if match is None:
+            return None
+        path, label, probability, bbox = match
+        return label, probability, bbox, path
+
+    def store(self, path, thumbnail, label, probability, bbox=None):
+        with self._lock:
+            self._entries[path] = (thumbnail, time.monotonic(), label,
+                                   probability, bbox)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self._capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Forget every cached result, e.g. after the model changes."""
+        with self._lock:
+            self._entries.clear()
+
+    def _expire(self, now):
+        stale = [path for path, entry in self._entries.items()
+                 if now - entry[1] > self._ttl]
+        for path in stale:
+            del self._entries[path]
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self._hits,
+                    "misses": self._misses,
+                    "entries": len(self._entries)}
+
+    def log_stats(self):
+        stats = self.stats()
+        total = stats["hits"] + stats["misses"]
+        rate = stats["hits"] / total * 100 if total else 0.0
+        cnn_logger.info(f'Frame cache: {stats["hits"]} hits, '
+                f'{stats["misses"]} misses ({rate:.1f}% hit rate)')
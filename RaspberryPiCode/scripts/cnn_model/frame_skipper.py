@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: frame_skipper.py
+# Date: 10/17/2026
+# Description: Load-shedding controller. When inference falls behind the
+#              camera, only every k-th queued frame (plus the newest) is
+#              classified so alert latency stays bounded.
+# Version: 1.0
+###############################################################################
+import math
+import time
+import logging
+from threading import Lock
+
+cnn_logger = logging.getLogger('cnn_model')
+
+# Weight of the newest sample in the latency and arrival averages
+EWMA_ALPHA = 0.2
+
+
+class FrameSkipper:
+    def __init__(self, max_age=2.0, max_stride=8, workers=1):
+        """max_age is the queueing delay, in seconds, the controller tries
+        to keep frames under."""
+        self._max_age = max_age
+        self._max_stride = max(1, max_stride)
+        self._workers = max(1, workers)
+        self._lock = Lock()
+        self._latency = 0.0
+        self._interval = 0.0
+        self._last_arrival = None
+        self._stride = 1
+        self._count = 0
+        self._dropped = 0
+
+    @property
+    def stride(self):
+        return self._stride
+
+    @property
+    def dropped(self):
+        return self._dropped
+
+    def note_arrival(self):
+        """Called for every frame the watcher submits."""
+        now = time.monotonic()
+        with self._lock:
+            if self._last_arrival is not None:
+                self._interval = self._ewma(self._interval,
+                                            now - self._last_arrival)
+            self._last_arrival = now
+
+    def note_inference(self, seconds_per_frame):
+        with self._lock:
+            self._latency = self._ewma(self._latency, seconds_per_frame)
+
+    def admit(self, enqueued_at, newest):
+        """Decide whether a frame just taken off the queue is classified.
+
+        newest is True when nothing is queued behind the frame; the newest
+        frame is always kept so the latest view is never lost.
+        """
+        age = time.monotonic() - enqueued_at
+        with self._lock:
+            self._update_stride(age)
+            self._count += 1
+            admitted = newest or self._count % self._stride == 0
+            if not admitted:
+                self._dropped += 1
+        return admitted
+
+    def _update_stride(self, age):
+        # Stride needed for the workers to keep up with the camera
+        stride = 1
+        if self._interval > 0:
+            stride = math.ceil(self._latency /
+                               (self._workers * self._interval))
+
+        if age > self._max_age:
+            stride = max(stride, self._stride + 1)
+        elif age > self._max_age / 2:
+            stride = max(stride, self._stride)
+
+        stride = min(max(1, stride), self._max_stride)
+        if stride != self._stride:
+            cnn_logger.info(f'Frame skipper: stride {self._stride} -> '
+                    f'{stride} (queue age {age:.2f} s, '
+                    f'{self._dropped} frames dropped)')
+            self._stride = stride
+
+    def _ewma(self, average, sample):
+        if average == 0.0:
+            return sample
+        return (1 - EWMA_ALPHA) * average + EWMA_ALPHA * sample
+
+    def stats(self):
+        with self._lock:
+            return {"stride": self._stride,
+                    "dropped": self._dropped,
+                    "latency_ms": self._latency * 1000}
+
+    def log_stats(self):
+        stats = self.stats()
+        cnn_logger.info(f'Frame skipper: stride {stats["stride"]}, '
+                f'{stats["dropped"]} frames dropped, inference '
+                f'{stats["latency_ms"]:.2f} ms/frame')
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: inference_session.py
+# Date: 10/17/2026
+# Description: Long-lived TFLite session. The model and labels are loaded
+#              once, warmed up, and reused for every frame.
+# Version: 1.0
+# Version: 1.1 - Batched invoke, interpreter threads, quantized models
+#                (10/17/2026)
+# Version: 1.2 - Model version tag for hot reloads (10/17/2026)
+###############################################################################
+import os
+import time
+import hashlib
+import numpy as np
+from model_utils import load_labels
+from model_utils import load_interpreter
+from model_utils import dequantize
+
+
+def model_version(model_path):
+    """Short tag identifying the model file, e.g. classify.tflite@1a2b3c4d."""
+    with open(model_path, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    return f'{os.path.basename(model_path)}@{digest[:8]}'
+
+
+class InferenceSession:
+    def __init__(self, model_path, label_path, num_threads=None):
+        self._model_path = model_path
+        self._label_path = label_path
+        self._num_threads = num_threads
+
+        start = time.perf_counter()
+        self._labels = load_labels(label_path)
+        self._interpreter = load_interpreter(model_path, num_threads)
+
+        # Tensor details never change for a loaded model, so look them up once
+        self._input_details = self._interpreter.get_input_details()[0]
+        self._output_details = self._interpreter.get_output_details()[0]
+        self._input_index = self._input_details['index']
+        self._output_index = self._output_details['index']
+        self.version = model_version(model_path)
+        self.load_ms = (time.perf_counter() - start) * 1000
+
+        self._batch_size = self._input_details['shape'][0]
+        self.last_invoke_ms = 0.0
+        self.warmup_ms = self.warm_up()
+
+    @property
+    def input_shape(self):
+        """Shape of a single frame, e.g. (256, 256, 3)."""
+        return tuple(self._input_details['shape'][1:])
+
+    @property
+    def input_dtype(self):
+        return self._input_details['dtype']
+
+    @property
+    def input_quantization(self):
+        """(scale, zero_point) of the input tensor; (0.0, 0) for float."""
+        return self._input_details['quantization']
+
+    @property
+    def labels(self):
+        return self._labels
+
+    @property
+    def mode(self):
+        dtype = np.dtype(self.input_dtype)
+        if dtype.kind == 'f':
+            return dtype.name
+        scale, zero_point = self.input_quantization
+        return (f'{dtype.name} quantized (scale {scale:.6g}, '
+                f'zero point {zero_point})')
+
+    def warm_up(self):
+        """Run one invoke on a blank frame so the first real frame does not
+        pay for lazy kernel and arena initialisation."""
+        blank = np.zeros(self._input_details['shape'],
+                         dtype=self._input_details['dtype'])
+        start = time.perf_counter()
+        self._interpreter.set_tensor(self._input_index, blank)
+        self._interpreter.invoke()
+        return (time.perf_counter() - start) * 1000
+
+    def classify(self, image):
+        """Classify a preprocessed (1, H, W, C) frame.
+
+        Returns the label and the fire probability, same as classify_image().
+        """
+        return self.classify_batch(image)[0]
+
+    def classify_batch(self, images):
+        """Classify an (N, H, W, C) stack of frames with a single invoke.
+
+        The input tensor is only resized when N differs from the previous
+        call, so a steady batch size never reallocates the tensor arena.
+        """
+        self._resize(images.shape[0])
+        start = time.perf_counter()
+        self._interpreter.set_tensor(self._input_index, images)
+        self._interpreter.invoke()
+        scores = dequantize(self._interpreter.get_tensor(self._output_index),
+                            self._output_details['quantization'])
+        self.last_invoke_ms = (time.perf_counter() - start) * 1000
+
+        results = []
+        for frame_scores in scores:
+            index = np.argmax(frame_scores)
+            probability = 1 - frame_scores[index]
+            results.append((self._labels[index], probability))
+        return results
+
+    def _resize(self, batch_size):
+        if batch_size == self._batch_size:
+            return
+        self._interpreter.resize_tensor_input(
+                self._input_index, [batch_size, *self.input_shape])
+        self._interpreter.allocate_tensors()
+        self._batch_size = batch_size
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: model_reloader.py
+# Date: 10/17/2026
+# Description: Watches the model and label files (and SIGHUP) and swaps a
+#              freshly loaded, warmed model into the worker pool without
+#              restarting the service.
+# Version: 1.0
+###############################################################################
+import os
+import time
+import logging
+
+cnn_logger = logging.getLogger('cnn_model')
+
+
+def file_stamp(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class ModelReloader:
+    def __init__(self, pool, model_path, label_path, signal_handler=None,
+            interval=2.0):
+        self._pool = pool
+        self._model_path = model_path
+        self._label_path = label_path
+        self._signal = signal_handler
+        self._interval = interval
+
+    def _stamp(self):
+        return (file_stamp(self._model_path), file_stamp(self._label_path))
+
+    def run(self):
+        loaded = self._stamp()
+        previous = loaded
+        while self._signal is None or self._signal.KEEP_PROCESSING:
+            time.sleep(self._interval)
+            stamp = self._stamp()
+
+            # Only reload once the files have stopped changing for a whole
+            # interval, so a model still being copied is never loaded
+            changed = stamp != loaded and stamp == previous and None not in stamp
+            previous = stamp
+
+            requested = self._signal is not None and self._signal.RELOAD
+            if requested:
+                self._signal.RELOAD = False
+
+            if changed or requested:
+                self.reload()
+                loaded = stamp
+
+    def reload(self):
+        start = time.perf_counter()
+        try:
+            session = self._pool.reload(self._model_path, self._label_path)
+        except Exception as e:
+            # Keep running on the current model; the next change retries
+            cnn_logger.info(f'Warning: model reload failed, keeping the '
+                    f'current model: {e}')
+            return
+        cnn_logger.info(f'Model reload: {session.version} ({session.mode}) '
+                f'loaded and warmed in '
+                f'{(time.perf_counter() - start) * 1000:.2f} ms')
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: model_utils.py
+# Date: 10/17/2026
+# Description: Util functions used to load and run the TFLite fire model.
+# Version: 1.0
+# Version: 1.1 - Reduced-scale decode and in-place preprocessing (10/17/2026)
+# Version: 1.2 - Quantized (uint8/int8) model inputs (10/17/2026)
+# Version: 1.3 - Overlapping tile preprocessing (10/17/2026)
+# Version: 1.4 - Importable without tflite_runtime for benchmarks (10/17/2026)
+# Version: 1.5 - Fill a subset of the tiles (10/17/2026)
+###############################################################################
+import struct
+import numpy as np
+import cv2
+try:
+    from tflite_runtime.interpreter import Interpreter
+except ImportError:
+    # Only the Pi has the runtime installed; bench_stages.py swaps in a
+    # stub interpreter on other machines
+    Interpreter = None
+
+# libjpeg can decode at 1/2, 1/4 or 1/8 scale straight from the DCT
+# coefficients, which skips most of the IDCT and colour conversion work.
+REDUCED_DECODE_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8),
+                        (4, cv2.IMREAD_REDUCED_COLOR_4),
+                        (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+# JPEG start-of-frame markers that carry the image dimensions
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+               0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def load_labels(path):
+    with open(path, 'r') as f:
+        return [line.strip() for line in f.readlines()]
+
+def load_interpreter(path, num_threads=None):
+    with open(path, 'rb') as f:
+        interpreter = Interpreter(model_content=f.read(),
+                                  num_threads=num_threads)
+    interpreter.allocate_tensors()
+    return interpreter
+
+def preprocess_image(image_path, input_shape):
+    image = cv2.imread(image_path)
+    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    image = cv2.resize(image, input_shape[:-1])
+    image = (image.astype(np.float32) / 127.5) - 1.0
+    image = np.expand_dims(image, 0)
+    return image
+
+def classify_image(interpreter, image, labels, threshold):
+    input_details = interpreter.get_input_details()
+    output_details = interpreter.get_output_details()
+    interpreter.set_tensor(input_details[0]['index'], image)
+    interpreter.invoke()
+    scores = interpreter.get_tensor(output_details[0]['index'])[0]
+    index = np.argmax(scores)
+    probability = 1 - scores[index]
+    label = labels[index]
+    return label, probability
+
+def jpeg_size(image_path):
+    """Return (width, height) from the JPEG header without decoding, or
+    None if the file is not a baseline/progressive JPEG."""
+    with open(image_path, 'rb') as f:
+        if f.read(2) != b'\xff\xd8':
+            return None
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:
+                continue
+            length = f.read(2)
+            if len(length) < 2:
+                return None
+            seg_len = struct.unpack('>H', length)[0]
+            if marker[1] in SOF_MARKERS:
+                data = f.read(5)
+                if len(data) < 5:
+                    return None
+                height, width = struct.unpack('>xHH', data)
+                return width, height
+            f.seek(seg_len - 2, 1)
+
+def reduced_decode_flag(image_size, target_size):
+    """Pick the coarsest DCT scale that still leaves the decoded frame at
+    least as large as the model input."""
+    if image_size is None:
+        return cv2.IMREAD_COLOR
+    width, height = image_size
+    target_w, target_h = target_size
+    for scale, flag in REDUCED_DECODE_FLAGS:
+        if width // scale >= target_w and height // scale >= target_h:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def build_input_lut(dtype=np.float32, quantization=(0.0, 0)):
+    """Map every uint8 pixel value to the model's input encoding.
+
+    Float models take pixels normalised to [-1, 1]. For quantized models
+    the same normalised value is quantized with the input tensor's scale
+    and zero point, so frames go straight from uint8 pixels to the
+    model's integer encoding without a float image in between.
+    """
+    normalized = (np.arange(256, dtype=np.float32) / 127.5) - 1.0
+    dtype = np.dtype(dtype)
+    if dtype.kind == 'f':
+        return normalized.astype(dtype)
+
+    scale, zero_point = quantization
+    if scale == 0:
+        raise ValueError(f'{dtype} model input has no quantization scale')
+    info = np.iinfo(dtype)
+    quantized = np.round(normalized / scale) + zero_point
+    return np.clip(quantized, info.min, info.max).astype(dtype)
+
+def dequantize(scores, quantization=(0.0, 0)):
+    """Convert quantized output scores back to real values."""
+    if scores.dtype.kind == 'f':
+        return scores
+    scale, zero_point = quantization
+    return (scores.astype(np.float32) - zero_point) * scale
+
+
+class FramePreprocessor:
+    """Approximates preprocess_image() without the per-step copies.
+
+    The output is not bit-identical: the JPEG is decoded at reduced scale
+    from the DCT coefficients and resized with INTER_AREA rather than
+    INTER_LINEAR, so pixels can differ by up to about 1.05 on the [-1, 1]
+    input scale.
+
+    The frame is decoded at reduced scale and resized into a reusable uint8
+    buffer. The channel swap is done into a second small buffer, and the
+    cast and normalisation (or quantization) are folded into one pass
+    through a 256 entry lookup table that writes straight into the
+    caller's buffer.
+    """
+
+    def __init__(self, input_shape, dtype=np.float32, quantization=(0.0, 0)):
+        height, width, channels = input_shape
+        self._size = (width, height)
+        self._resized = np.empty((height, width, channels), dtype=np.uint8)
+        self._rgb = np.empty((height, width, channels), dtype=np.uint8)
+        self._lut = build_input_lut(dtype, quantization)
+
+    @property
+    def dtype(self):
+        return self._lut.dtype
+
+    def decode(self, image_path):
+        """Decode and resize to the model input size (BGR, uint8).
+
+        The returned array is an internal buffer reused by the next call.
+        """
+        flag = reduced_decode_flag(jpeg_size(image_path), self._size)
+        image = cv2.imread(image_path, flag)
+        if image is None:
+            raise ValueError(f'unable to decode {image_path}')
+        if image.shape[1::-1] == self._size:
+            self._resized[...] = image
+        else:
+            cv2.resize(image, self._size, dst=self._resized,
+                       interpolation=cv2.INTER_AREA)
+        return self._resized
+
+    def fill(self, image_path, out):
+        """Write the model input for image_path into out (H, W, C)."""
+        self.normalize(self.decode(image_path), out)
+
+    def normalize(self, image, out):
+        cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        cv2.LUT(self._rgb, self._lut, dst=out)
+
+
+def tile_positions(length, tile, stride):
+    """Start offsets of tiles along one axis; the last tile is flush with
+    the far edge so the whole frame is covered."""
+    if length <= tile:
+        return [0]
+    positions = list(range(0, length - tile, stride))
+    positions.append(length - tile)
+    return positions
+
+
+class FrameTiler:
+    """Split a frame into overlapping model-sized tiles.
+
+    Small fires vanish when the whole frame is shrunk to the model input,
+    so the frame is kept near full resolution and classified tile by tile.
+    If max_tiles is set the frame is scaled down just enough for the tile
+    grid to fit, which keeps per-frame latency predictable.
+    """
+
+    def __init__(self, input_shape, overlap=0.25, max_tiles=0,
+            dtype=np.float32, quantization=(0.0, 0)):
+        height, width, channels = input_shape
+        self._tile = (width, height)
+        self._stride = (max(1, int(width * (1 - overlap))),
+                        max(1, int(height * (1 - overlap))))
+        self._max_tiles = max_tiles
+        self._preprocessor = FramePreprocessor(input_shape, dtype, quantization)
+
+    @property
+    def max_tiles(self):
+        return self._max_tiles
+
+    @property
+    def dtype(self):
+        return self._preprocessor.dtype
+
+    def grid(self, width, height):
+        xs = tile_positions(width, self._tile[0], self._stride[0])
+        ys = tile_positions(height, self._tile[1], self._stride[1])
+        return [(x, y) for y in ys for x in xs]
+
+    def scale_for(self, width, height):
+        """Largest scale <= 1 whose tile grid fits within max_tiles, never
+        shrinking the frame below a single tile."""
+        min_scale = max(self._tile[0] / width, self._tile[1] / height)
+        if min_scale >= 1:
+            return min_scale
+        scale = 1.0
+        while self._max_tiles and scale > min_scale:
+            if len(self.grid(int(width * scale), int(height * scale))) <= self._max_tiles:
+                break
+            scale = max(min_scale, scale * 0.9)
+        return scale
+
+    def decode(self, image_path):
+        """Decode the frame (BGR, uint8) at the tiling scale.
+
+        Returns the image and the scale applied to the original frame.
+        """
+        size = jpeg_size(image_path)
+        if size is None:
+            image = cv2.imread(image_path)
+            if image is None:
+                raise ValueError(f'unable to decode {image_path}')
+            size = image.shape[1::-1]
+        else:
+            image = None
+
+        scale = self.scale_for(*size)
+        target = (max(self._tile[0], int(size[0] * scale)),
+                  max(self._tile[1], int(size[1] * scale)))
+        if image is None:
+            image = cv2.imread(image_path, reduced_decode_flag(size, target))
+            if image is None:
+                raise ValueError(f'unable to decode {image_path}')
+        if image.shape[1::-1] != target:
+            image = cv2.resize(image, target, interpolation=cv2.INTER_AREA)
+        return image, scale
+
+    def crop(self, image, position):
+        """BGR view of the tile of image at position (x, y)."""
+        x, y = position
+        width, height = self._tile
+        return image[y:y + height, x:x + width]
+
+    def fill(self, image, scale, out, positions=None):
+        """Write the tiles at positions (default: the whole grid) into
+        out[i] and return the tile boxes as (x, y, w, h) in original frame
+        pixels."""
+        if positions is None:
+            positions = self.grid(image.shape[1], image.shape[0])
+        boxes = []
+        width, height = self._tile
+        for i, (x, y) in enumerate(positions):
+            self._preprocessor.normalize(self.crop(image, (x, y)), out[i])
+            boxes.append((int(x / scale), int(y / scale),
+                          int(width / scale), int(height / scale)))
+        return boxes
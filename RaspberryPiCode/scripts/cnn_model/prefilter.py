@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: prefilter.py
+# Date: 10/17/2026
+# Description: Cheap fire-colour prefilter run ahead of the CNN. Frames with
+#              almost no fire-coloured pixels skip inference.
+# Version: 1.0
+# Version: 1.1 - Screen tiles one by one in tiled mode (10/17/2026)
+###############################################################################
+import os
+import glob
+import logging
+import cv2
+from threading import Lock
+from model_utils import FramePreprocessor
+
+cnn_logger = logging.getLogger('cnn_model')
+
+# OpenCV hue runs 0-180. Flame colours are red through yellow, so two hue
+# bands are needed around the red wrap-around point.
+FIRE_HSV_RANGES = (((0, 80, 150), (35, 255, 255)),
+                   ((170, 80, 150), (180, 255, 255)))
+
+# Side length of the thumbnail the colour test runs on
+PREFILTER_SIZE = 64
+
+# How often (in frames) the skip statistics are logged
+REPORT_INTERVAL = 100
+
+
+class FireColorPrefilter:
+    def __init__(self, floor=0.5, size=PREFILTER_SIZE):
+        """floor is the fire-coloured pixel percentage below which a frame
+        skips the CNN."""
+        self._floor = floor / 100
+        self._size = (size, size)
+        self._lock = Lock()
+        self._frames = 0
+        self._skipped = 0
+        self._infer_ms = 0.0
+        self._saved_ms = 0.0
+
+    def fire_fraction(self, image):
+        """Fraction of fire-coloured pixels in a BGR uint8 frame."""
+        small = cv2.resize(image, self._size, interpolation=cv2.INTER_AREA)
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        count = 0
+        for lower, upper in FIRE_HSV_RANGES:
+            count += cv2.countNonZero(cv2.inRange(hsv, lower, upper))
+        return count / (self._size[0] * self._size[1])
+
+    def below_floor(self, image):
+        return self.fire_fraction(image) < self._floor
+
+    def skip(self, image):
+        """True if the frame is clearly fire free and should skip the CNN."""
+        skipped = self.below_floor(image)
+        self._count(skipped)
+        return skipped
+
+    def keep_tiles(self, tiles):
+        """Indices of the tiles worth classifying.
+
+        A small distant fire is a speck in the whole frame, so in tiled
+        mode each tile is held to the floor on its own. The frame counts
+        as skipped when no tile is kept.
+        """
+        kept = [i for i, tile in enumerate(tiles) if not self.below_floor(tile)]
+        self._count(not kept)
+        return kept
+
+    def _count(self, skipped):
+        with self._lock:
+            self._frames += 1
+            if skipped:
+                self._skipped += 1
+                self._saved_ms += self._infer_ms
+            report = self._frames % REPORT_INTERVAL == 0
+        if report:
+            self.log_stats()
+
+    def note_inference(self, ms_per_frame):
+        """Track the per-frame CNN cost so skipped frames can be costed."""
+        with self._lock:
+            if self._infer_ms == 0.0:
+                self._infer_ms = ms_per_frame
+            else:
+                self._infer_ms = 0.9 * self._infer_ms + 0.1 * ms_per_frame
+
+    def stats(self):
+        with self._lock:
+            return {"frames": self._frames,
+                    "skipped": self._skipped,
+                    "saved_ms": self._saved_ms}
+
+    def log_stats(self):
+        stats = self.stats()
+        cnn_logger.info(f'Prefilter: skipped {stats["skipped"]} of '
+                f'{stats["frames"]} frames, saved ~{stats["saved_ms"]:.0f} ms '
+                f'of CNN time')
+
+
+def evaluate_prefilter(prefilter, directory, labels, input_shape):
+    """Measure the prefilter against a labeled directory.
+
+    directory must contain one sub-directory per label (e.g. Fire/ and
+    NonFire/). The first label is the fire class, as in classify_image().
+    A fire frame the prefilter would skip is a false negative.
+    """
+    preprocessor = FramePreprocessor(input_shape)
+    results = {}
+    for label in labels:
+        files = []
+        for name in os.listdir(directory):
+            if name.lower() == label.lower():
+                files = glob.glob(os.path.join(directory, name, '*.jp*g'))
+        skipped = 0
+        for path in files:
+            image = preprocessor.decode(path)
+            if prefilter.below_floor(image):
+                skipped += 1
+        results[label] = {"frames": len(files), "skipped": skipped}
+
+    fire = results[labels[0]]
+    fn_rate = fire["skipped"] / fire["frames"] if fire["frames"] else 0.0
+    results["false_negative_rate"] = fn_rate
+    return results
@@ -4,13 +4,19 @@
 # Date: 03/14/2023
 # Description: Signal handler object used to catch signal interrupts.
 # Version: 1.0
+# Version: 1.1 - SIGHUP requests a model reload (10/17/2026)
 ###############################################################################
 import signal
 class SignalHandler:
     KEEP_PROCESSING = True
+    RELOAD = False
     def __init__(self):
         signal.signal(signal.SIGINT, self.exit_gracefully)
         signal.signal(signal.SIGTERM, self.exit_gracefully)
+        signal.signal(signal.SIGHUP, self.request_reload)
+
+    def request_reload(self, signum, frame):
+        self.RELOAD = True
 
     def exit_gracefully(self, signum, frame):
         self.KEEP_PROCESSING = False
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: test_alert_confirm.py
+# Date: 10/17/2026
+# Description: Unit tests for the multi-frame alert confirmation.
+# Version: 1.0
+###############################################################################
+import time
+import unittest
+from alert_confirm import AlertConfirmer
+
+
+class AlertConfirmerTest(unittest.TestCase):
+    def feed(self, confirmer, probabilities):
+        return [confirmer.observe(f'f{i}', p)
+                for i, p in enumerate(probabilities)]
+
+    def test_consecutive_hits_alert_once_per_confirmation(self):
+        confirmer = AlertConfirmer(50.0, confirm=3, window=5, holdoff=0)
+        results = self.feed(confirmer, [90, 60, 70, 65, 66, 67])
+        self.assertEqual([r and r[:2] for r in results],
+                [None, None, ('f0', 90), None, None, ('f5', 67)])
+
+    def test_alerted_path_never_repeats(self):
+        confirmer = AlertConfirmer(50.0, confirm=2, window=4, holdoff=0)
+        results = self.feed(confirmer, [99, 60, 55, 58, 51, 52, 53, 54])
+        paths = [r[0] for r in results if r is not None]
+        self.assertEqual(len(paths), len(set(paths)))
+        self.assertEqual(len(paths), 4)
+
+    def test_holdoff_does_not_resend_the_alerted_frame(self):
+        confirmer = AlertConfirmer(50.0, confirm=2, window=5, holdoff=0.05)
+        self.assertIsNone(confirmer.observe('f0', 95))
+        self.assertEqual(confirmer.observe('f1', 60)[0], 'f0')
+        self.assertIsNone(confirmer.observe('f2', 70))
+        time.sleep(0.06)
+        self.assertEqual(confirmer.observe('f3', 65)[0], 'f2')
+        self.assertEqual(confirmer.stats(), {"raised": 2, "suppressed": 1})
+
+    def test_single_frame_default(self):
+        confirmer = AlertConfirmer(50.0)
+        results = self.feed(confirmer, [40, 60, 70])
+        self.assertEqual([r and r[0] for r in results], [None, 'f1', 'f2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
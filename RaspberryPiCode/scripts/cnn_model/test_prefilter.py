@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: test_prefilter.py
+# Date: 10/17/2026
+# Description: Unit tests for the fire-colour prefilter in tiled mode.
+# Version: 1.0
+###############################################################################
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import cv2
+from batcher import FrameBatcher
+from model_utils import FrameTiler
+from prefilter import FireColorPrefilter
+
+INPUT_SHAPE = (224, 224, 3)
+
+
+class FakeSession:
+    input_shape = INPUT_SHAPE
+    input_dtype = np.float32
+    input_quantization = (0.0, 0)
+    version = 'fake'
+    last_invoke_ms = 1.0
+
+    def __init__(self):
+        self.tiles = []
+
+    def classify_batch(self, batch):
+        self.tiles.append(len(batch))
+        return [('Fire', 90.0)] * len(batch)
+
+
+def frame_with_patch(width=1920, height=1080, patch=40, at=(1500, 800)):
+    """Grey frame with one small flame-orange square."""
+    image = np.full((height, width, 3), 90, dtype=np.uint8)
+    x, y = at
+    image[y:y + patch, x:x + patch] = (0, 128, 255)
+    return image
+
+
+class TiledPrefilterTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, image):
+        path = os.path.join(self.directory, name)
+        cv2.imwrite(path, image)
+        return path
+
+    def test_small_patch_survives_tile_screening(self):
+        image = frame_with_patch()
+        prefilter = FireColorPrefilter(floor=0.5)
+        tiler = FrameTiler(INPUT_SHAPE)
+        positions = tiler.grid(image.shape[1], image.shape[0])
+
+        self.assertTrue(prefilter.below_floor(image))
+        kept = prefilter.keep_tiles([tiler.crop(image, p) for p in positions])
+        self.assertTrue(kept)
+        self.assertLess(len(kept), len(positions))
+        self.assertEqual(prefilter.stats()["skipped"], 0)
+
+    def test_blank_frame_is_skipped(self):
+        image = np.full((1080, 1920, 3), 90, dtype=np.uint8)
+        prefilter = FireColorPrefilter(floor=0.5)
+        tiler = FrameTiler(INPUT_SHAPE)
+        positions = tiler.grid(image.shape[1], image.shape[0])
+
+        self.assertEqual(prefilter.keep_tiles(
+                [tiler.crop(image, p) for p in positions]), [])
+        self.assertEqual(prefilter.stats(),
+                {"frames": 1, "skipped": 1, "saved_ms": 0.0})
+
+    def test_batcher_classifies_only_the_fire_tiles(self):
+        results = []
+        session = FakeSession()
+        batcher = FrameBatcher(session, lambda *r: results.append(r),
+                prefilter=FireColorPrefilter(floor=0.5), tiling=(0.25, 0))
+        fire = self.write('fire.png', frame_with_patch())
+        blank = self.write('blank.png',
+                np.full((1080, 1920, 3), 90, dtype=np.uint8))
+        batcher.process([('fire', fire), ('blank', blank)])
+
+        reported = {r[0]: r for r in results}
+        self.assertEqual(reported['fire'][3], 90.0)
+        x, y, w, h = reported['fire'][4]
+        self.assertTrue(x <= 1500 < x + w and y <= 800 < y + h)
+        self.assertIsNone(reported['blank'][3])
+        self.assertEqual(len(session.tiles), 1)
+        self.assertLess(session.tiles[0], 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
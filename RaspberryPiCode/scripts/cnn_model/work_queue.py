@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: work_queue.py
+# Date: 10/17/2026
+# Description: Bounded queue between the watchdog handler and the
+#              inference workers, with an explicit overflow policy.
+#              Deliberately FIFO: there is no priority ordering.
+# Version: 1.0
+# Version: 1.1 - First in, first out; the unused priority is gone (10/17/2026)
+# Version: 1.2 - Documented as a bounded drop-policy FIFO by design (10/17/2026)
+###############################################################################
+import time
+import logging
+from threading import Condition
+from collections import deque
+from queue import Empty
+
+cnn_logger = logging.getLogger('cnn_model')
+
+DROP_OLDEST = "drop-oldest"
+DROP_NEWEST = "drop-newest"
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST)
+
+# Log every this many overflows (plus the first one)
+REPORT_INTERVAL = 100
+
+
+class WorkQueue:
+    """Bounded drop-policy FIFO, by design; there is no priority.
+
+    Never blocks the producer. When full, drop-oldest evicts the oldest
+    queued item and drop-newest rejects the incoming one; either way
+    on_drop is told which item was lost. Freshness under backlog comes
+    from the drop policy, not from reordering: the pool releases results
+    in submission order for the alert confirmer, so serving the newest
+    frame first would only leave its result waiting behind older ones."""
+
+    def __init__(self, maxsize=64, policy=DROP_OLDEST, on_drop=None):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f'unknown overflow policy {policy}')
+        self._maxsize = maxsize
+        self._policy = policy
+        self._on_drop = on_drop
+        self._cond = Condition()
+        self._items = deque()
+        self._overflows = 0
+        self._high_water = 0
+
+    def put(self, item):
+        dropped = None
+        with self._cond:
+            if self._maxsize and len(self._items) >= self._maxsize:
+                self._overflows += 1
+                if self._policy == DROP_NEWEST:
+                    dropped = item
+                else:
+                    dropped = self._items.popleft()
+                report = self._overflows % REPORT_INTERVAL == 1
+            if dropped is not item:
+                self._items.append(item)
+                self._high_water = max(self._high_water, len(self._items))
+                self._cond.notify()
+
+        if dropped is not None:
+            if report:
+                cnn_logger.info(f'Work queue full ({self._maxsize}): '
+                        f'{self._overflows} frames dropped ({self._policy})')
+            if self._on_drop is not None:
+                self._on_drop(dropped)
+
+    def get(self, block=True, timeout=None):
+        with self._cond:
+            if block:
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while not self._items:
+                    remaining = None
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                    self._cond.wait(remaining)
+            if not self._items:
+                raise Empty
+            return self._items.popleft()
+
+    def qsize(self):
+        with self._cond:
+            return len(self._items)
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def stats(self):
+        with self._cond:
+            return {"depth": len(self._items),
+                    "high_water": self._high_water,
+                    "overflows": self._overflows,
+                    "maxsize": self._maxsize,
+                    "policy": self._policy}
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: worker_pool.py
+# Date: 10/17/2026
+# Description: Pool of inference workers. Each worker owns its own
+#              interpreter; results are handed back in submission order.
+# Version: 1.0
+# Version: 1.1 - Pass the winning tile box through to the result (10/17/2026)
+# Version: 1.2 - Hot-swap worker sessions on model reload (10/17/2026)
+# Version: 1.3 - Bounded, prioritized work queue (10/17/2026)
+# Version: 1.4 - Work queue is first in, first out (10/17/2026)
+###############################################################################
+import time
+import itertools
+import logging
+from threading import Lock
+from threading import Thread
+from batcher import FrameBatcher
+from work_queue import WorkQueue
+from work_queue import DROP_OLDEST
+from inference_session import InferenceSession
+
+cnn_logger = logging.getLogger('cnn_model')
+
+
+class InferencePool:
+    """The TFLite interpreter releases the GIL while invoking and OpenCV
+    releases it while decoding, so plain threads keep all cores busy
+    without paying to pickle frames between processes."""
+
+    def __init__(self, model_path, label_path, on_result, workers=1,
+            num_threads=None, batch_size=1, max_wait_ms=50.0,
+            signal_handler=None, prefilter=None, cache=None, skipper=None,
+            tiling=None, queue_size=64, overflow=DROP_OLDEST):
+        self._on_result = on_result
+        self._queue = WorkQueue(queue_size, overflow, self._dropped)
+        self._seq = itertools.count()
+        self._skipper = skipper
+        self._cache = cache
+        self._num_threads = num_threads
+
+        # Reorder buffer: results that finished ahead of an earlier frame
+        self._lock = Lock()
+        self._next_seq = 0
+        self._pending = {}
+
+        self._workers = []
+        for i in range(max(1, workers)):
+            session = InferenceSession(model_path, label_path, num_threads)
+            cnn_logger.info(f'Worker {i}: {session.mode} model loaded in '
+                    f'{session.load_ms:.2f} ms (warm-up invoke '
+                    f'{session.warmup_ms:.2f} ms)')
+            self._workers.append(FrameBatcher(session, self._complete,
+                    batch_size, max_wait_ms, signal_handler, self._queue,
+                    f'worker {i}', prefilter, cache, skipper, tiling))
+        self._threads = []
+
+    def start(self):
+        for worker in self._workers:
+            thread = Thread(target=worker.run)
+            thread.start()
+            self._threads.append(thread)
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def reload(self, model_path, label_path):
+        """Load and warm a new session per worker on the calling thread,
+        then hand them over. Workers keep classifying with the old model
+        until their next batch."""
+        sessions = [InferenceSession(model_path, label_path, self._num_threads)
+                    for worker in self._workers]
+        if self._cache is not None:
+            self._cache.clear()
+        for worker, session in zip(self._workers, sessions):
+            worker.set_session(session)
+        return sessions[0]
+
+    def submit(self, path):
+        """Queue a frame for the workers; never blocks the caller."""
+        if self._skipper is not None:
+            self._skipper.note_arrival()
+        self._queue.put((next(self._seq), path, time.monotonic()))
+
+    def queue_stats(self):
+        return self._queue.stats()
+
+    def _dropped(self, item):
+        # Release the frame's slot so later results are not held back
+        seq, path, enqueued_at = item
+        self._complete(seq, path, None, None)
+
+    def _complete(self, seq, path, label, probability, bbox=None, version=None):
+        with self._lock:
+            self._pending[seq] = (path, label, probability, bbox, version)
+            while self._next_seq in self._pending:
+                result = self._pending.pop(self._next_seq)
+                self._next_seq += 1
+                if result[2] is not None:
+                    self._on_result(*result)
@@ -4,14 +4,14 @@
 # Date: 03/14/2023
 # Description: CNN simulator used to simulate the triggering of fire detection.
 # Version: 1.0
+# Version: 1.1 - Alerts published as soon as they are queued (10/17/2026)
+# Version: 1.2 - Frames renamed into the watched directory (10/17/2026)
 ###############################################################################
 import os
 import sys
 import getopt
 import random
-import base64
 import json
-import time
 import zmq
 from threading import Thread
 from signal_handler import SignalHandler
@@ -77,12 +77,17 @@ class FileHandler(FileSystemEventHandler):
     def on_any_event(self, event):
         if event.event_type == "created":
             path = event.src_path
-            if path.lower().endswith(('.jpg','.jpeg')):
-                if os.path.getsize(path) != 0:
-                    probability = random.uniform(0, 100)
+        elif event.event_type == "moved":
+            # The image scraper renames complete frames into place
+            path = event.dest_path
+        else:
+            return
+        if path.lower().endswith(('.jpg','.jpeg')):
+            if os.path.getsize(path) != 0:
+                probability = random.uniform(0, 100)
 
-                    if probability > self._prob_rate:
-                        self._queue.put(Alert(path, random.uniform(50,100)))
+                if probability > self._prob_rate:
+                    self._queue.put(Alert(path, random.uniform(50,100)))
 
 def publish_alert(queue, url="tcp://127.0.0.1:5556"):
 
@@ -98,7 +103,9 @@ def publish_alert(queue, url="tcp://127.0.0.1:5556"):
                 pub_sock.send_json(json.dumps(alert.get_msg()))
                 print(f'{json.dumps(alert.get_msg())}')
         except Empty:
-            time.sleep(0.5)
+            # get() has already waited; the timeout only lets the loop
+            # notice a shutdown
+            pass
 
 
 def usage():
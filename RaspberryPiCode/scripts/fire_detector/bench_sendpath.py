@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: bench_sendpath.py
+# Date: 10/17/2026
+# Description: Sender CPU time and peak Python heap per detection for the
+#              image send paths: legacy base64 JSON, framed from memory and
+#              framed with sendfile() from the outbox.
+# Version: 1.0
+###############################################################################
+import sys
+import json
+import time
+import getopt
+import socket
+import asyncio
+import tempfile
+import tracemalloc
+import multiprocessing
+from fireDetector import Detection, send_legacy, send_framed, take_detection
+from detection_protocol import *
+from bench_uplink import start_gcs
+from outbox import Outbox
+from detection_scheduler import DetectionScheduler
+
+
+def usage():
+    print('Usage: bench_sendpath.py -i <image> [<option>...]\n')
+    print('\t-i <file>\tJPEG to send [--image]')
+    print('\t-n <count>\tDetections per run [--count] (default: 20)')
+    print('\t-h\t\tPrint the help menu')
+
+
+def get_params():
+    config = {"image": None, "count": 20}
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "i:n:h",
+                ["image=", "count=", "help"])
+    except getopt.GetoptError as err:
+        print(err)
+        usage()
+        sys.exit(2)
+
+    for o, a in opts:
+        if o in ("-i", "--image"):
+            config["image"] = a
+        elif o in ("-n", "--count"):
+            config["count"] = int(a)
+        elif o in ("-h", "--help"):
+            usage()
+            sys.exit()
+        else:
+            assert False, "unhandled option"
+    if config["image"] is None:
+        usage()
+        sys.exit(2)
+    return config
+
+
+def serve_gcs(conn):
+    conn.send(start_gcs())
+    conn.recv()
+
+
+def make_outbox(image, count):
+    outbox_dir = tempfile.TemporaryDirectory(prefix='outbox-')
+    outbox = Outbox(outbox_dir.name)
+    for i in range(count):
+        det = Detection(f'{i:032x}', 1679155200000000 + i,
+                38.5, -121.7, 120.0, 87.5, -2.1, 0.4, 22.3)
+        det.set_img_file(image)
+        det.set_accuracy(90.0)
+        det.store(outbox)
+    return outbox_dir, outbox, DetectionScheduler(outbox, cell_m=0)
+
+
+async def run(name, port, config):
+    outbox_dir, outbox, scheduler = make_outbox(config["image"], config["count"])
+    sock = socket.create_connection(('127.0.0.1', port))
+    sock.setblocking(False)
+    if name != "legacy" and await client_handshake_async(sock) is None:
+        raise ConnectionError('handshake failed')
+
+    tracemalloc.start()
+    cpu = time.process_time()
+    start = time.perf_counter()
+    for seq in range(1, config["count"] + 1):
+        detection = take_detection(scheduler)
+        if name == "legacy":
+            await send_legacy(sock, detection, outbox)
+        else:
+            if name == "memory":
+                detection._img_bytes = detection.get_image(outbox)
+            await send_framed(sock, detection, seq, outbox)
+        outbox.done(detection.outbox_id)
+        detection = None
+    cpu = time.process_time() - cpu
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    sock.close()
+    outbox.close()
+    outbox_dir.cleanup()
+    return {"mode": name, "detections": config["count"],
+            "cpu_ms_per_det": 1000.0 * cpu / config["count"],
+            "ms_per_det": 1000.0 * elapsed / config["count"],
+            "peak_heap_kb": peak // 1024}
+
+
+if __name__ == '__main__':
+    config = get_params()
+    # The receiving side runs in its own process, out of the measurements
+    conn, child_conn = multiprocessing.Pipe()
+    gcs = multiprocessing.Process(target=serve_gcs, args=(child_conn,),
+            daemon=True)
+    gcs.start()
+    port = conn.recv()
+    results = [asyncio.run(run(name, port, config))
+            for name in ("legacy", "memory", "sendfile")]
+    for r in results:
+        print(f'{r["mode"]:>8}: {r["cpu_ms_per_det"]:.2f} ms CPU/det, '
+              f'{r["ms_per_det"]:.2f} ms/det, peak heap {r["peak_heap_kb"]} KB')
+    print(json.dumps(results))
+    conn.send(None)
+    gcs.join()
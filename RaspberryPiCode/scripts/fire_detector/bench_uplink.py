@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: bench_uplink.py
+# Date: 10/17/2026
+# Description: Uplink throughput over an emulated radio link (one-way delay
+#              and bandwidth cap): legacy protocol, stop-and-wait framing
+#              and the pipelined window.
+# Version: 1.0
+###############################################################################
+import os
+import sys
+import json
+import time
+import getopt
+import socket
+import select
+import asyncio
+import tempfile
+from queue import Queue
+from threading import Thread
+from fireDetector import Detection, send_legacy, send_pipelined
+from detection_protocol import *
+from uplink_window import UplinkWindow
+from outbox import Outbox
+from detection_scheduler import DetectionScheduler
+
+ACK_EVERY = 4
+
+
+def usage():
+    print('Usage: bench_uplink.py [<option>...]\n')
+    print('\t-d <ms>\t\tOne-way link delay [--delay] (default: 150)')
+    print('\t-r <kbit/s>\tLink rate [--rate] (default: 2000)')
+    print('\t-s <KB>\t\tDetection image size [--size] (default: 50)')
+    print('\t-n <count>\tDetections per run [--count] (default: 20)')
+    print('\t-W <count>\tWindow for the pipelined run [--window] (default: 8)')
+    print('\t-h\t\tPrint the help menu')
+
+
+def get_params():
+    config = {"delay": 150.0, "rate": 2000.0, "size": 50, "count": 20,
+            "window": 8}
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "d:r:s:n:W:h",
+                ["delay=", "rate=", "size=", "count=", "window=", "help"])
+    except getopt.GetoptError as err:
+        print(err)
+        usage()
+        sys.exit(2)
+
+    for o, a in opts:
+        if o in ("-d", "--delay"):
+            config["delay"] = float(a)
+        elif o in ("-r", "--rate"):
+            config["rate"] = float(a)
+        elif o in ("-s", "--size"):
+            config["size"] = int(a)
+        elif o in ("-n", "--count"):
+            config["count"] = int(a)
+        elif o in ("-W", "--window"):
+            config["window"] = int(a)
+        elif o in ("-h", "--help"):
+            usage()
+            sys.exit()
+        else:
+            assert False, "unhandled option"
+    return config
+
+
+class LinkEmulator:
+    """TCP relay that holds every chunk for the one-way delay and paces
+    it to the link rate, in both directions."""
+    def __init__(self, target_port, delay_ms, rate_kbps):
+        self._target = ('127.0.0.1', target_port)
+        self._delay = delay_ms / 1000.0
+        self._rate = rate_kbps * 1000.0 / 8
+        self._sock = socket.create_server(('127.0.0.1', 0))
+        self.port = self._sock.getsockname()[1]
+        Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            client, _ = self._sock.accept()
+            server = socket.create_connection(self._target)
+            for src, dst in ((client, server), (server, client)):
+                Thread(target=self._pipe, args=(src, dst), daemon=True).start()
+
+    def _pipe(self, src, dst):
+        chunks = Queue()
+        def read():
+            while True:
+                try:
+                    data = src.recv(65536)
+                except OSError:
+                    data = b''
+                chunks.put((time.monotonic(), data))
+                if not data:
+                    return
+        Thread(target=read, daemon=True).start()
+
+        link_free = 0.0
+        while True:
+            arrived, data = chunks.get()
+            if not data:
+                try:
+                    dst.shutdown(socket.SHUT_WR)
+                except OSError:
+                    pass
+                return
+            link_free = max(arrived, link_free) + len(data) / self._rate
+            wait = link_free + self._delay - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                dst.sendall(data)
+            except OSError:
+                return
+
+
+def gcs_stub(conn):
+    """Receives like mission_srv without storing anything."""
+    try:
+        if not is_framed(conn):
+            while True:
+                det = conn.recv(1024).decode('utf-8').split(',')
+                if len(det) < 2:
+                    break
+                conn.send(b'NAME_SIZE')
+                recv_exact(conn, int(det[1]))
+                conn.send(det[0].encode('utf-8'))
+            return
+        read_frame(conn)
+        send_hello(conn)
+        unacked = 0
+        while True:
+            version, kind, seq, meta, payload = read_frame(conn)
+            unacked += 1
+            if unacked >= ACK_EVERY or not select.select([conn], [], [], 0)[0]:
+                conn.sendall(pack_header(ACK, seq))
+                unacked = 0
+    except ConnectionError:
+        pass
+    finally:
+        conn.close()
+
+
+def start_gcs():
+    sock = socket.create_server(('127.0.0.1', 0))
+    def serve():
+        while True:
+            conn, _ = sock.accept()
+            Thread(target=gcs_stub, args=(conn,), daemon=True).start()
+    Thread(target=serve, daemon=True).start()
+    return sock.getsockname()[1]
+
+
+def make_detections(count, size):
+    dets = []
+    for i in range(count):
+        det = Detection(os.urandom(16).hex(), 1679155200000000 + i,
+                38.5, -121.7, 120.0, 87.5, -2.1, 0.4, 22.3)
+        det._img_bytes = os.urandom(size * 1024)
+        det.set_accuracy(90.0)
+        dets.append(det)
+    return dets
+
+
+async def run(name, port, dets, window_size=None):
+    sock = socket.create_connection(('127.0.0.1', port))
+    sock.setblocking(False)
+    start = time.perf_counter()
+    if window_size is None:
+        for det in dets:
+            await send_legacy(sock, det)
+        elapsed = time.perf_counter() - start
+    else:
+        if await client_handshake_async(sock) is None:
+            raise ConnectionError('handshake failed')
+        outbox_dir = tempfile.TemporaryDirectory(prefix='outbox-')
+        outbox = Outbox(outbox_dir.name)
+        # Every bench detection is at the same spot; do not merge them
+        scheduler = DetectionScheduler(outbox, cell_m=0)
+        for det in dets:
+            scheduler.store(det)
+        wake = asyncio.Event()
+        stop = asyncio.Event()
+        def acked(det):
+            outbox.done(det.outbox_id)
+            if window.acked >= len(dets):
+                stop.set()
+                wake.set()
+        start = time.perf_counter()
+        window = UplinkWindow(window_size, acked)
+        await send_pipelined(sock, scheduler, window, wake, stop)
+        elapsed = time.perf_counter() - start
+        outbox.close()
+        outbox_dir.cleanup()
+    sock.close()
+    return {"mode": name, "detections": len(dets),
+            "seconds": elapsed,
+            "det_per_s": len(dets) / elapsed,
+            "ms_per_det": 1000.0 * elapsed / len(dets)}
+
+
+if __name__ == '__main__':
+    config = get_params()
+    link = LinkEmulator(start_gcs(), config["delay"], config["rate"])
+    dets = make_detections(config["count"], config["size"])
+
+    wire_s = config["size"] * 1024 * 8 / (config["rate"] * 1000)
+    print(f'link: {2 * config["delay"]:.0f} ms RTT, {config["rate"]:.0f} kbit/s, '
+          f'{config["size"]} KB images ({1000 * wire_s:.0f} ms each on the wire)')
+
+    results = [asyncio.run(run("legacy", link.port, dets)),
+               asyncio.run(run("window 1", link.port, dets, 1)),
+               asyncio.run(run(f'window {config["window"]}', link.port,
+                   dets, config["window"]))]
+    for r in results:
+        print(f'{r["mode"]:>10}: {r["ms_per_det"]:.0f} ms/det, '
+              f'{r["det_per_s"]:.2f} det/s')
+    print(json.dumps(results))
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: detection_protocol.py
+# Date: 10/17/2026
+# Description: Versioned, length-prefixed binary framing for detections
+#              sent from the drone to the GCS. A frame is a fixed header,
+#              the packed telemetry and the raw JPEG bytes. The same file
+#              is shipped with fire_detector and mission_srv.
+# Version: 1.0
+# Version: 1.1 - v2 adds full-resolution FOLLOWUP frames (10/17/2026)
+# Version: 1.2 - Header-only encoding and scatter-gather send (10/17/2026)
+# Version: 1.3 - v3 carries the count of merged detections (10/17/2026)
+# Version: 1.4 - asyncio variants for non-blocking sockets (10/17/2026)
+# Version: 1.5 - Only a close or a bad reply to HELLO means legacy (10/17/2026)
+# Version: 1.6 - Payload length capped before anything is read (10/17/2026)
+###############################################################################
+import socket
+import struct
+import asyncio
+
+MAGIC   = b'FDP'
+VERSION = 3
+
+# Frame types
+HELLO     = 1
+DETECTION = 2
+ACK       = 3
+FOLLOWUP  = 4   # v2: full-resolution image for an already sent detection
+
+# magic, version, type, flags, meta length, sequence, payload length
+HEADER = struct.Struct('!3sBBBHII')
+
+# Largest payload a reader will allocate for. Full-resolution frames are a
+# few MB; a corrupt or hostile length would otherwise be allocated as is.
+MAX_PAYLOAD = 64 * 1024 * 1024
+
+# time (us), lat, lon, alt, yaw, pitch, roll, speed, accuracy, uuid length
+TELEMETRY = struct.Struct('!QddddddddB')
+
+# v3: detections merged into this one, after the uuid. Older readers stop
+# at the uuid and never see it.
+COUNT = struct.Struct('!I')
+
+TEL_KEYS = ['time', 'lat', 'lon', 'alt', 'yaw', 'pitch', 'roll', 'speed',
+        'accuracy']
+
+
+class ProtocolError(ConnectionError):
+    pass
+
+
+class ConnectionClosed(ConnectionError):
+    """The peer closed the connection, as opposed to it being reset."""
+    pass
+
+
+def pack_header(kind, seq=0, meta_len=0, payload_len=0, version=VERSION):
+    return HEADER.pack(MAGIC, version, kind, 0, meta_len, seq, payload_len)
+
+
+def unpack_header(buf):
+    magic, version, kind, flags, meta_len, seq, payload_len = \
+            HEADER.unpack(buf)
+    if magic != MAGIC:
+        raise ProtocolError(f'Bad frame magic {magic!r}')
+    if payload_len > MAX_PAYLOAD:
+        raise ProtocolError(f'Frame payload of {payload_len} bytes exceeds '
+                f'{MAX_PAYLOAD}')
+    return version, kind, meta_len, seq, payload_len
+
+
+def pack_telemetry(det):
+    uuid = det['uuid'].encode('utf-8')
+    return TELEMETRY.pack(int(det['time']),
+            *[float(det[key]) for key in TEL_KEYS[1:]], len(uuid)) + uuid + \
+            COUNT.pack(int(det.get('count', 1)))
+
+
+def unpack_telemetry(meta):
+    values = TELEMETRY.unpack_from(meta)
+    det = dict(zip(TEL_KEYS, values[:-1]))
+    start = TELEMETRY.size
+    end = start + values[-1]
+    det['uuid'] = bytes(meta[start:end]).decode('utf-8')
+    det['count'] = COUNT.unpack_from(meta, end)[0] \
+            if len(meta) >= end + COUNT.size else 1
+    return det
+
+
+def frame_header(det, image_len, seq=0, kind=DETECTION):
+    """Header and packed telemetry of a frame; the image_len JPEG bytes
+    that follow can be sent straight from wherever they are."""
+    meta = pack_telemetry(det)
+    return pack_header(kind, seq, len(meta), image_len) + meta
+
+
+def encode_detection(det, image, seq=0, kind=DETECTION):
+    """Returns (header, image): the header carries the packed telemetry so
+    the JPEG bytes can be sent as they are."""
+    return frame_header(det, len(image), seq, kind), image
+
+
+def send_buffers(sock, buffers):
+    """sendall() for a list of buffers, in as few sendmsg() calls as the
+    socket allows and without joining them."""
+    views = [memoryview(buf).cast('B') for buf in buffers if len(buf)]
+    while views:
+        sent = sock.sendmsg(views)
+        while views and sent >= len(views[0]):
+            sent -= len(views[0])
+            views.pop(0)
+        if sent:
+            views[0] = views[0][sent:]
+
+
+def recv_exact(sock, size):
+    buf = bytearray(size)
+    view = memoryview(buf)
+    got = 0
+    while got < size:
+        n = sock.recv_into(view[got:], size - got)
+        if n == 0:
+            raise ConnectionClosed('Connection closed mid-frame')
+        got += n
+    return buf
+
+
+def read_frame(sock):
+    """Reads one frame. Returns (version, type, seq, meta, payload).
+    A payload over MAX_PAYLOAD raises ProtocolError before it is read."""
+    version, kind, meta_len, seq, payload_len = \
+            unpack_header(recv_exact(sock, HEADER.size))
+    meta = recv_exact(sock, meta_len) if meta_len else b''
+    payload = recv_exact(sock, payload_len) if payload_len else b''
+    return version, kind, seq, meta, payload
+
+
+def is_framed(sock):
+    """Server side: peek at the first bytes of a new connection. Legacy
+    drones open with an ASCII 'uuid,size' header, which never starts with
+    the magic."""
+    head = sock.recv(len(MAGIC), socket.MSG_PEEK | socket.MSG_WAITALL)
+    if len(head) == 0:
+        raise ConnectionClosed('Connection closed before first frame')
+    return head == MAGIC
+
+
+def send_hello(sock, version=VERSION):
+    sock.sendall(pack_header(HELLO, version=version))
+
+
+def client_handshake(sock):
+    """Drone side: offer our version and return the one the GCS agreed to,
+    or None when the GCS only speaks the legacy protocol (it closes the
+    connection on an unknown header). Resets and timeouts raise OSError:
+    they say nothing about the GCS."""
+    send_hello(sock)
+    try:
+        version, kind, _, _, _ = read_frame(sock)
+    except (ConnectionClosed, ProtocolError):
+        return None
+    if kind != HELLO:
+        return None
+    return min(version, VERSION)
+
+
+async def wait_writable(sock):
+    loop = asyncio.get_running_loop()
+    ready = loop.create_future()
+    def wake():
+        if not ready.done():
+            ready.set_result(None)
+    loop.add_writer(sock.fileno(), wake)
+    try:
+        await ready
+    finally:
+        loop.remove_writer(sock.fileno())
+
+
+async def send_buffers_async(sock, buffers, flags=0):
+    """send_buffers() on a non-blocking socket."""
+    views = [memoryview(buf).cast('B') for buf in buffers if len(buf)]
+    while views:
+        try:
+            sent = sock.sendmsg(views, [], flags)
+        except (BlockingIOError, InterruptedError):
+            await wait_writable(sock)
+            continue
+        while views and sent >= len(views[0]):
+            sent -= len(views[0])
+            views.pop(0)
+        if sent:
+            views[0] = views[0][sent:]
+
+
+async def recv_exact_async(sock, size):
+    loop = asyncio.get_running_loop()
+    buf = bytearray(size)
+    view = memoryview(buf)
+    got = 0
+    while got < size:
+        n = await loop.sock_recv_into(sock, view[got:])
+        if n == 0:
+            raise ConnectionClosed('Connection closed mid-frame')
+        got += n
+    return buf
+
+
+async def read_frame_async(sock):
+    """read_frame() on a non-blocking socket."""
+    version, kind, meta_len, seq, payload_len = \
+            unpack_header(await recv_exact_async(sock, HEADER.size))
+    meta = await recv_exact_async(sock, meta_len) if meta_len else b''
+    payload = await recv_exact_async(sock, payload_len) \
+            if payload_len else b''
+    return version, kind, seq, meta, payload
+
+
+async def client_handshake_async(sock, timeout=5.0):
+    """client_handshake() on a non-blocking socket; no reply within
+    timeout raises socket.timeout."""
+    await send_buffers_async(sock, [pack_header(HELLO)])
+    try:
+        version, kind, _, _, _ = await asyncio.wait_for(
+                read_frame_async(sock), timeout)
+    except (ConnectionClosed, ProtocolError):
+        return None
+    except asyncio.TimeoutError:
+        raise socket.timeout('No reply to HELLO') from None
+    if kind != HELLO:
+        return None
+    return min(version, VERSION)
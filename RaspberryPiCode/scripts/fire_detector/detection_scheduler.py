@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: detection_scheduler.py
+# Date: 10/17/2026
+# Description: Decides which pending detection in the outbox goes to the
+#              GCS next: a weighted mix of accuracy, how recent the frame
+#              is and whether its area was reported lately. Detections in
+#              the same geographic cell and time window are merged into
+#              the best of them and a count.
+# Version: 1.0
+# Version: 1.1 - Bookkeeping guarded for use from worker threads (10/17/2026)
+###############################################################################
+import math
+import time
+import logging
+from threading import Lock
+from detection_protocol import unpack_telemetry
+
+fireDetector_logger = logging.getLogger('fire_detector')
+
+# Metres per degree of latitude
+M_PER_DEG = 111320.0
+
+
+class DetectionScheduler:
+    def __init__(self, outbox, accuracy_weight=1.0, age_weight=1.0,
+            novelty_weight=20.0, cell_m=250.0, window=600.0):
+        """Score = accuracy_weight * accuracy (%) - age_weight * age
+        (minutes) + novelty_weight while the detection's cell_m sized cell
+        has not been reported for window seconds. cell_m 0 disables
+        merging and novelty."""
+        self.outbox = outbox
+        # Guards _info, _reported and merged; never held across outbox
+        # calls
+        self._lock = Lock()
+        self._accuracy_weight = accuracy_weight
+        self._age_weight = age_weight
+        self._novelty_weight = novelty_weight
+        self._cell_m = cell_m
+        self._window = window
+        # entry id -> (accuracy, capture time in minutes, cell)
+        self._info = {}
+        # cell -> monotonic time it was last acknowledged by the GCS
+        self._reported = {}
+        self.merged = 0
+
+        for entry_id, meta, flags in outbox.pending():
+            self._track(entry_id, unpack_telemetry(meta))
+
+    def cell(self, lat, lon):
+        """Grid cell of a position, roughly cell_m on a side."""
+        if self._cell_m <= 0:
+            return None
+        row = math.floor(lat * M_PER_DEG / self._cell_m)
+        # Width of the row at its centre latitude, so a cell stays square
+        centre = math.radians((row + 0.5) * self._cell_m / M_PER_DEG)
+        col = math.floor(lon * M_PER_DEG * max(math.cos(centre), 0.01)
+                / self._cell_m)
+        return row, col
+
+    def _track(self, entry_id, tel):
+        self._info[entry_id] = (tel['accuracy'], tel['time'] / 60e6,
+                self.cell(tel['lat'], tel['lon']))
+
+    def store(self, detection):
+        """Adds a detection to the outbox; returns the entry id."""
+        entry_id = detection.store(self.outbox)
+        with self._lock:
+            if entry_id is not None:
+                self._track(entry_id, detection.get_telemetry())
+            if len(self._info) > 2 * self.outbox.qsize() + 64:
+                # Entries the outbox evicted or finished
+                self._info = {k: v for k, v in self._info.items()
+                        if k in self.outbox}
+        return entry_id
+
+    def _novel(self, cell, now, reported):
+        at = reported.get(cell)
+        return at is None or now - at > self._window
+
+    def _key(self, now, tracked, reported):
+        def key(entry):
+            info = tracked.get(entry.entry_id)
+            if info is None:
+                # Stored a moment ago and not tracked yet
+                return (not entry.flags, -math.inf)
+            accuracy, minutes, cell = info
+            # Capture time stands in for -age: the offset is the same
+            # for every entry, so the order is too
+            score = self._accuracy_weight * accuracy + \
+                    self._age_weight * minutes
+            if cell is not None and self._novel(cell, now, reported):
+                score += self._novelty_weight
+            # Flagged entries (follow-ups) only once nothing else is left
+            return (not entry.flags, score)
+        return key
+
+    def take(self, timeout=1, min_priority=None):
+        """Best pending entry: (entry_id, meta, image length, flags,
+        merged entry ids). The merged entries are claimed along with it
+        and finish when it does. Raises queue.Empty."""
+        now = time.monotonic()
+        with self._lock:
+            # The key runs under the outbox lock, so it gets copies
+            # rather than taking this one there
+            tracked = dict(self._info)
+            reported = dict(self._reported)
+        entry_id, meta, image_len, flags = self.outbox.get(block=True,
+                timeout=timeout, min_priority=min_priority,
+                key=self._key(now, tracked, reported))
+
+        merged = []
+        info = tracked.get(entry_id)
+        if not flags and info is not None and info[2] is not None:
+            accuracy, minutes, cell = info
+            for other, (_, other_minutes, other_cell) in tracked.items():
+                if other == entry_id or other_cell != cell or \
+                        abs(other_minutes - minutes) * 60 > self._window:
+                    continue
+                if self.outbox.claim(other, flags=0):
+                    merged.append(other)
+            if merged:
+                with self._lock:
+                    self.merged += len(merged)
+                fireDetector_logger.info(f'Merged {len(merged)} detections '
+                        f'in cell {cell} into entry {entry_id}')
+        return entry_id, meta, image_len, flags, merged
+
+    def reported(self, entry_id, merged=()):
+        """The GCS acknowledged entry_id on behalf of itself and merged.
+        Finishes the merged entries; entry_id is left to the caller, which
+        may keep it as a follow-up."""
+        now = time.monotonic()
+        with self._lock:
+            info = self._info.get(entry_id)
+            if info is not None and info[2] is not None:
+                self._reported[info[2]] = now
+            for other in merged:
+                self._info.pop(other, None)
+            if len(self._reported) > 1024:
+                self._reported = {cell: at for cell, at in
+                        self._reported.items() if now - at <= self._window}
+        for other in merged:
+            self.outbox.done(other)
+
+    def requeue(self, entry_id, merged=()):
+        """Puts an entry and the ones merged into it back for later."""
+        for other in (entry_id, *merged):
+            self.outbox.requeue(other)
+
+    def stats(self):
+        with self._lock:
+            return {"tracked": len(self._info), "merged": self.merged,
+                    "cells": len(self._reported)}
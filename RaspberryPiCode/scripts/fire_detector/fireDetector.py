@@ -4,6 +4,19 @@
 # Date: 03/18/2023
 # Description: Script used to detect fire alert messages and output to GCS.
 # Version: 1.0
+# Version: 1.1 - Event-driven telemetry index instead of polling (10/17/2026)
+# Version: 1.2 - Binary framed protocol with legacy fallback (10/17/2026)
+# Version: 1.3 - Windowed, pipelined uplink with cumulative ACKs (10/17/2026)
+# Version: 1.4 - Disk-backed store-and-forward outbox (10/17/2026)
+# Version: 1.5 - Bandwidth-adaptive re-encoding and follow-up frames (10/17/2026)
+# Version: 1.6 - Connection manager with backoff, keepalive and counters (10/17/2026)
+# Version: 1.7 - Images stream from file to socket instead of memory (10/17/2026)
+# Version: 1.8 - Scheduled by accuracy, recency and novelty; merged per cell (10/17/2026)
+# Version: 1.9 - Single asyncio event loop, no timer-driven waits (10/17/2026)
+# Version: 2.0 - Protocol negotiated per connection; flaps retry framed (10/17/2026)
+# Version: 2.1 - Outbox and disk work kept off the event loop (10/17/2026)
+# Version: 2.2 - Removed code the asyncio rewrite left unused (10/17/2026)
+# Version: 2.3 - Malformed alerts and failed alert tasks are logged (10/17/2026)
 ###############################################################################
 
 import getopt
@@ -15,20 +28,34 @@ import base64
 import time
 import uuid
 import socket
+import signal
+import asyncio
 import zmq
+import zmq.asyncio
 import logging
 import logging.handlers
 from signal_handler import SignalHandler
-from threading import Thread
-from queue import Queue
+from telemetry_index import TelemetryIndex
+from detection_protocol import *
+from uplink_window import UplinkWindow
+from outbox import Outbox
+from uplink_budget import UplinkBudget
+from uplink_connection import UplinkConnection
+from detection_scheduler import DetectionScheduler
+from functools import partial
+from collections import deque
 from queue import Empty
-from zmq import ContextTerminated
-from json.decoder import JSONDecodeError
 
 signal_handler = SignalHandler()
 
 LOG_FILENAME = '/opt/firedrone/logs/fire_detector.log'
 
+# Outbox flag for an original kept to be sent again at full resolution
+OUTBOX_FOLLOWUP = 1
+
+# Follow-ups are queued below every new detection
+FOLLOWUP_PENALTY = 1000.0
+
 #Set up a specific logger with a desired output level
 
 fireDetector_logger = logging.getLogger('fire_detector')
@@ -53,24 +80,63 @@ class Detection:
         self._pitch = pitch
         self._roll = roll
         self._speed = speed
-        self._image = {}
+        # None while the image only lives in a file or the outbox
+        self._img_bytes = None
+        self._img_file = None
+        self._img_len = 0
         self._accuracy = 0.0
-
-    def load_img_file(self, img_file):
-
-        with open(img_file, 'rb') as fp:
-            img_bytes = fp.read()
-
-        base64_encoded_data = base64.b64encode(img_bytes)
-
-        self._image = {'b64': f'{base64_encoded_data.decode("utf-8")}',
-                'ext': 'jpg'}
-       
-
-    def set_accuracy(self, accuracy):
-        self._accuracy = accuracy
-
-    def get_msg(self):
+        self.outbox_id = None
+        # Outbox entries sent on this one's behalf
+        self.merged = []
+        self.count = 1
+        self.followup = False
+        self.reduced = False
+
+    def set_img_file(self, img_file):
+        """Refers to the image without reading it."""
+        self._img_file = img_file
+        self._img_len = os.path.getsize(img_file)
+
+    def store(self, outbox):
+        """Adds the detection to the outbox, copying a file-backed image
+        there without loading it. Returns the entry id."""
+        meta = pack_telemetry(self.get_telemetry())
+        if self._img_bytes is None:
+            return outbox.put_file(self._accuracy, meta, self._img_file)
+        return outbox.put(self._accuracy, meta, self._img_bytes)
+
+    @staticmethod
+    def unpack(meta, image_len):
+        """Detection for an outbox entry; the image stays on disk."""
+        tel = unpack_telemetry(meta)
+        detection = Detection(tel['uuid'], tel['time'], tel['lat'],
+                tel['lon'], tel['alt'], tel['yaw'], tel['pitch'],
+                tel['roll'], tel['speed'])
+        detection.set_accuracy(tel['accuracy'])
+        detection._img_len = image_len
+        return detection
+
+    def get_image_len(self):
+        if self._img_bytes is not None:
+            return len(self._img_bytes)
+        return self._img_len
+
+    def get_image(self, outbox=None):
+        """The JPEG bytes, read from the outbox if not in memory."""
+        if self._img_bytes is not None:
+            return self._img_bytes
+        if self.outbox_id is not None:
+            return outbox.read_image(self.outbox_id)
+        with open(self._img_file, 'rb') as fp:
+            return fp.read()
+
+    def get_header(self, seq=0):
+        """Binary framed encoding, without the raw JPEG bytes that
+        follow it."""
+        return frame_header(self.get_telemetry(), self.get_image_len(), seq,
+                FOLLOWUP if self.followup else DETECTION)
+
+    def get_telemetry(self):
         return {"uuid" : self._uuid,
                 "time" : self._time,
                 "lat" : self._lat,
@@ -81,27 +147,65 @@ class Detection:
                 "roll" : self._roll,
                 "speed" : self._speed,
                 "accuracy" : self._accuracy,
-                "image" : self._image
-                }
-def create_detection(filename, accuracy):
+                "count" : self.count}
+
+    def set_accuracy(self, accuracy):
+        self._accuracy = accuracy
+
+    def get_msg(self, image):
+        """Legacy encoding: telemetry and base64 image in one JSON, as
+        buffers to send back to back so the base64 is never copied into
+        a string."""
+        msg = json.dumps(self.get_telemetry())
+        return [f'{msg[:-1]}, "image": {{"b64": "'.encode('utf-8'),
+                base64.b64encode(image), b'", "ext": "jpg"}}']
+
+
+class AlertLatency:
+    """Alert-to-wire times: from an alert arriving over ZMQ to its frame
+    being handed to the socket."""
+    def __init__(self, capacity=1024):
+        self._capacity = capacity
+        self._received = {}
+        self._samples = deque(maxlen=capacity)
+
+    def received(self, entry_id, at):
+        self._received[entry_id] = at
+        while len(self._received) > 4 * self._capacity:
+            # Never sent: evicted, or merged into another detection
+            del self._received[next(iter(self._received))]
+
+    def sent(self, detection):
+        """Milliseconds since the detection's alert, None if unknown."""
+        at = self._received.pop(detection.outbox_id, None)
+        for other in detection.merged:
+            self._received.pop(other, None)
+        if at is None:
+            return None
+        ms = 1000.0 * (time.monotonic() - at)
+        self._samples.append(ms)
+        return ms
+
+    def stats(self):
+        samples = sorted(self._samples)
+        if not samples:
+            return {"count": 0}
+        return {"count": len(samples),
+                "mean_ms": round(sum(samples) / len(samples), 1),
+                "p50_ms": round(samples[len(samples) // 2], 1),
+                "p90_ms": round(samples[int(len(samples) * 0.9)], 1),
+                "max_ms": round(samples[-1], 1)}
+
+
+async def create_detection(filename, accuracy, index, timeout=5.0):
     path, img_file = os.path.split(filename)
     tel_file = os.path.splitext(img_file)[0]
     tel_path = path.rsplit('/', 1)[0]+f'/telemetry/{tel_file}'
 
-    while not os.path.exists(tel_path) and signal_handler.KEEP_PROCESSING:
-        #print(f'Warning: {tel_path} does not exist')
-        time.sleep(0.5)
-
-    data : dict = None
-    try:
-        with open(tel_path) as js:
-            data = json.load(js)
-    except JSONDecodeError:
-        #print(f'Warning: JSON Error - failed to parse {tel_file}')  
-        fireDetector_logger.info(f'Warning: JSON Error - failed to parse {tel_file}')  
-    except FileNotFoundError:
-        #print(f'Warning: FileNotFound Error - failed to parse {tel_file}')  
-        fireDetector_logger.info(f'Warning: FileNotFound Error - failed to parse {tel_file}')  
+    data : dict = await index.get_async(tel_path, timeout)
+    if data is None:
+        #print(f'Warning: no telemetry for {tel_file}')  
+        fireDetector_logger.info(f'Warning: no telemetry for {tel_file} after {timeout}s')  
 
 
     detection = None
@@ -111,34 +215,253 @@ def create_detection(filename, accuracy):
                 data['lon'], data['alt'], data['yaw'], data['pitch'],
                 data['roll'], data['speed'])
 
-        detection.load_img_file(filename)
+        detection.set_img_file(filename)
         detection.set_accuracy(accuracy)
 
     return detection
 
-def process_queue(context, url="tcp://127.0.0.1:5556", queue=None):
+async def store_alert(data, received, scheduler, index, timeout, wake,
+        latency=None):
+    det = await create_detection(data["filename"], data["accuracy"],
+            index, timeout)
+    if det is None:
+        return
+    # The image is copied into the outbox off the event loop
+    entry_id = await asyncio.to_thread(scheduler.store, det)
+    if entry_id is not None:
+        if latency is not None:
+            latency.received(entry_id, received)
+        wake.set()
+
+def alert_done(pending, task):
+    pending.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        fireDetector_logger.info(f'Warning: alert failed: {task.exception()!r}')
+
+async def process_queue(context, url="tcp://127.0.0.1:5556", scheduler=None,
+        index=None, timeout=5.0, wake=None, latency=None):
     socket = context.socket(zmq.SUB)
     socket.connect(url)
     socket.subscribe('Alert')
+    # Alerts are handled concurrently, so one waiting on its telemetry
+    # does not hold up the next
+    pending = set()
     try:
-        while signal_handler.KEEP_PROCESSING:
-            topic, msg = socket.recv_multipart()
-            data = {}
-            if queue is not None:
-                data = json.loads(json.loads(msg.decode('utf-8')))
-                det = create_detection(data["filename"],data["accuracy"])
-                #queue.put(create_detection(data["filename"],data["accuracy"]))
-                if det is not None:
-                    queue.put(det)
-
-    except ContextTerminated as e:
+        while True:
+            topic, msg = await socket.recv_multipart()
+            received = time.monotonic()
+            if scheduler is not None:
+                try:
+                    data = json.loads(json.loads(msg.decode('utf-8')))
+                except ValueError as e:
+                    fireDetector_logger.info(f'Warning: dropped malformed alert: {e}')
+                    continue
+                task = asyncio.create_task(store_alert(data, received,
+                        scheduler, index, timeout, wake, latency))
+                pending.add(task)
+                task.add_done_callback(partial(alert_done, pending))
+
+    except asyncio.CancelledError:
         #print(f'Shutting down socket queue!')
         fireDetector_logger.info(f'Shutting down socket queue!')
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        raise
+    finally:
+        socket.close(linger=0)
+
+
+def take_detection(scheduler, timeout=1, min_priority=None):
+    """Next detection from the outbox; raises Empty."""
+    entry_id, meta, image_len, flags, merged = scheduler.take(timeout,
+            min_priority)
+    detection = Detection.unpack(meta, image_len)
+    detection.outbox_id = entry_id
+    detection.merged = merged
+    detection.count = 1 + len(merged)
+    detection.followup = bool(flags & OUTBOX_FOLLOWUP)
+    return detection
 
+def release_detection(scheduler, followup, detection):
+    """The GCS acknowledged detection. A reduced image keeps its original
+    in the outbox as a full-resolution follow-up."""
+    outbox = scheduler.outbox
+    scheduler.reported(detection.outbox_id, detection.merged)
+    if detection.reduced and followup:
+        outbox.demote(detection.outbox_id,
+                detection._accuracy - FOLLOWUP_PENALTY, OUTBOX_FOLLOWUP)
+    else:
+        outbox.done(detection.outbox_id)
+
+async def send_legacy(sock, detection, outbox=None):
+    loop = asyncio.get_running_loop()
+    # Reading and base64 of the whole image stay off the event loop
+    det_data = await asyncio.to_thread(
+            lambda: detection.get_msg(detection.get_image(outbox)))
+
+    # Detection id extracted
+    detection_id    = detection._uuid
+
+    # Detection size sent 
+    det_size = sum(len(part) for part in det_data)
+    det_info = f'{detection_id},{det_size}'
+    
+    await loop.sock_sendall(sock, det_info.encode('utf-8'))
+    ack = await loop.sock_recv(sock, 1024)
+
+    await send_buffers_async(sock, det_data)
+
+    ack = await loop.sock_recv(sock, 1024)
+    if not ack:
+        raise ConnectionResetError('GCS closed the uplink')
+    return ack
+
+async def send_framed(sock, detection, seq, outbox=None):
+    header = detection.get_header(seq)
+    if detection._img_bytes is not None:
+        await send_buffers_async(sock, [header, detection._img_bytes])
+        return
+    # Straight from the outbox segment to the socket, in the kernel
+    fp, offset, count = await asyncio.to_thread(outbox.open_image,
+            detection.outbox_id)
+    with fp:
+        await send_buffers_async(sock, [header],
+                getattr(socket, 'MSG_MORE', 0))
+        await asyncio.get_running_loop().sock_sendfile(sock, fp, offset,
+                count)
+
+async def read_acks(sock, window, wake, release=None):
+    try:
+        while True:
+            version, kind, seq, meta, payload = await read_frame_async(sock)
+            if kind == ACK:
+                released = window.ack(seq)
+                fireDetector_logger.info(f'ACK: {seq}\t{window.in_flight()} in flight')
+                wake.set()
+                if release is not None and released:
+                    # Finishing outbox entries syncs and compacts on disk
+                    await asyncio.to_thread(
+                            lambda: [release(d) for d in released])
+                    wake.set()
+    except (ConnectionError, OSError) as e:
+        fireDetector_logger.info(f'Uplink closed: {e}')
+    finally:
+        window.connection_lost()
+        wake.set()
+
+async def send_pipelined(sock, scheduler, window, wake, stop, budget=None,
+        version=VERSION, latency=None, release=None):
+    """Keeps up to the window size of detections in flight, so the link
+    is not idle for a round trip per image. Nothing polls: the sender
+    waits on the wake event, set for a stored alert, an ACK or a lost
+    link. Acknowledged detections are passed to release on a worker
+    thread. Raises ConnectionError when the GCS goes away;
+    unacknowledged detections stay in the window."""
+    outbox = scheduler.outbox
+    window.connected()
+    ack_task = asyncio.create_task(read_acks(sock, window, wake, release))
+    try:
+        resend = window.unacked()
+        if resend:
+            fireDetector_logger.info(f'Retransmitting {len(resend)} unacknowledged detections')
+        for seq, detection in resend:
+            await send_framed(sock, detection, seq, outbox)
+
+        while not stop.is_set():
+            wake.clear()
+            if not window.is_connected():
+                raise ConnectionResetError('GCS closed the uplink')
+            if not window.has_room():
+                await wake.wait()
+                continue
+            # Follow-ups only go out on an otherwise idle link, and only
+            # to a GCS that understands them
+            if version < 2 or window.in_flight():
+                min_priority = 0.0
+            else:
+                min_priority = None
+            try:
+                detection = await asyncio.to_thread(take_detection,
+                        scheduler, 0, min_priority)
+            except Empty:
+                await wake.wait()
+                continue
+            limit = None if budget is None else budget.budget()
+            if limit is not None and not detection.followup and \
+                    detection.get_image_len() > limit:
+                # Only an image that has to be re-encoded is loaded
+                image, detection.reduced = await asyncio.to_thread(
+                        lambda: budget.fit(detection.get_image(outbox)))
+                if detection.reduced:
+                    detection._img_bytes = image
+            seq = window.add(detection, detection.get_image_len())
+            await send_framed(sock, detection, seq, outbox)
+            ms = None if latency is None else latency.sent(detection)
+            fireDetector_logger.info(f'Sent: {seq}\t{window.in_flight()} in flight'
+                    + ('' if ms is None else f'\t{ms:.1f} ms after alert'))
+
+        # Give the last ACKs a moment before the socket is closed
+        try:
+            await asyncio.wait_for(drained(window, wake), 2)
+        except asyncio.TimeoutError:
+            pass
+    finally:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        await ack_task
+
+async def drained(window, wake):
+    while window.in_flight() and window.is_connected():
+        wake.clear()
+        await wake.wait()
+
+async def send_legacy_loop(sock, scheduler, wake, stop, latency=None):
+    cnt = 0
+    while not stop.is_set():
+        wake.clear()
+        try:
+            # Queue updated with new detection
+            detection = await asyncio.to_thread(take_detection,
+                    scheduler, 0)
+        except Empty:
+            await wake.wait()
+            continue
+        cnt += 1
+        try:
+            ack = await send_legacy(sock, detection, scheduler.outbox)
+        except OSError:
+            await asyncio.to_thread(scheduler.requeue, detection.outbox_id,
+                    detection.merged)
+            raise
+        await asyncio.to_thread(release_detection, scheduler, False,
+                detection)
+        if latency is not None:
+            latency.sent(detection)
+        #print(f'Count: {cnt}\t ACK: {ack}')
+        fireDetector_logger.info(f'Count: {cnt}\t ACK: {ack}')
 
 def usage():
     print('Usage: fireDetector [<option>...] [<destination:port>...]\n')
     print('-z <zmq_url>\tZeroMQ URL (default: tcp://127.0.0.1:5556)')
+    print('-b <directory>\tOutbox for detections waiting on the uplink [--outbox] (default: /opt/firedrone/outbox)')
+    print('--outbox-size <MB>\tOutbox size cap; lowest accuracy is evicted first (default: 512)')
+    print('--uplink-budget <seconds>\tRe-encode images that would take longer than this on the measured link, 0 to disable (default: 2)')
+    print('--uplink-rate <kB/s>\tLink rate assumed until the first ACK is measured (default: 100)')
+    print('--followup\tSend the full-resolution original of re-encoded images when the link is idle')
+    print('--accuracy-weight <w>\tScheduling weight per accuracy percent (default: 1)')
+    print('--age-weight <w>\tScheduling penalty per minute of detection age (default: 1)')
+    print('--novelty-weight <w>\tScheduling bonus for a cell not reported within the merge window (default: 20)')
+    print('--cell <m>\tGrid cell size for merging and novelty, 0 to disable (default: 250)')
+    print('--merge-window <seconds>\tDetections this close in time and in one cell are sent as one (default: 600)')
+    print('-W <count>\tDetections in flight before waiting for an ACK [--window] (default: 8)')
+    print('--keepalive <seconds>\tTCP keepalive idle time, 0 to disable (default: 5)')
+    print('--user-timeout <seconds>\tDrop the link when sent data goes unacknowledged this long (default: 10)')
+    print('--sndbuf <KB>\tSocket send buffer, 0 for the system default (default: 256)')
+    print('-l\t\tAlways use the legacy base64/JSON protocol [--legacy]')
+    print('-t <seconds>\tLongest wait for an image\'s telemetry [--telemetry-timeout] (default: 5)')
     print('default destination <127.0.0.1:16551>')
 
 
@@ -148,9 +471,30 @@ def get_params():
     dst     = "127.0.0.1"
     port    = 16551
     zmq_url = "tcp://127.0.0.1:5556"
+    tel_timeout = 5.0
+    legacy  = False
+    window  = 8
+    outbox_dir = "/opt/firedrone/outbox"
+    outbox_size = 512
+    uplink_budget = 2.0
+    uplink_rate = 100.0
+    followup = False
+    keepalive = 5
+    user_timeout = 10.0
+    sndbuf = 256
+    accuracy_weight = 1.0
+    age_weight = 1.0
+    novelty_weight = 20.0
+    cell = 250.0
+    merge_window = 600.0
 
     try:
-        opts, args = getopt.getopt(sys.argv[1:], "d:h:z:", ["dst", "help", "zmq"])
+        opts, args = getopt.getopt(sys.argv[1:], "d:h:z:t:lW:b:",
+                ["dst", "help", "zmq=", "telemetry-timeout=", "legacy",
+                 "window=", "outbox=", "outbox-size=", "uplink-budget=",
+                 "uplink-rate=", "followup", "keepalive=", "user-timeout=",
+                 "sndbuf=", "accuracy-weight=", "age-weight=",
+                 "novelty-weight=", "cell=", "merge-window="])
     except getopt.GetoptError as err:
         # print help information and exit:
         print(err)  # will print something like "option -a not recognized"
@@ -158,11 +502,43 @@ def get_params():
         sys.exit(2)
 
     for o, a in opts:
-        if o in ("-o", "--zmq"):
+        if o in ("-z", "--zmq"):
             zmq_url = a
         elif o in ("-h", "--help"):
             usage()
             sys.exit()
+        elif o in ("-t", "--telemetry-timeout"):
+            tel_timeout = float(a)
+        elif o in ("-l", "--legacy"):
+            legacy = True
+        elif o in ("-W", "--window"):
+            window = int(a)
+        elif o in ("-b", "--outbox"):
+            outbox_dir = a
+        elif o == "--outbox-size":
+            outbox_size = int(a)
+        elif o == "--uplink-budget":
+            uplink_budget = float(a)
+        elif o == "--uplink-rate":
+            uplink_rate = float(a)
+        elif o == "--followup":
+            followup = True
+        elif o == "--keepalive":
+            keepalive = int(a)
+        elif o == "--user-timeout":
+            user_timeout = float(a)
+        elif o == "--sndbuf":
+            sndbuf = int(a)
+        elif o == "--accuracy-weight":
+            accuracy_weight = float(a)
+        elif o == "--age-weight":
+            age_weight = float(a)
+        elif o == "--novelty-weight":
+            novelty_weight = float(a)
+        elif o == "--cell":
+            cell = float(a)
+        elif o == "--merge-window":
+            merge_window = float(a)
         else:
             assert False, "unhandled option"
     # ...
@@ -173,91 +549,120 @@ def get_params():
 
     return { "dst": dst,
             "port" : port,
-            "zmq" : zmq_url}
+            "zmq" : zmq_url,
+            "tel_timeout" : tel_timeout,
+            "legacy" : legacy,
+            "window" : window,
+            "outbox" : outbox_dir,
+            "outbox_size" : outbox_size,
+            "uplink_budget" : uplink_budget,
+            "uplink_rate" : uplink_rate,
+            "followup" : followup,
+            "keepalive" : keepalive,
+            "user_timeout" : user_timeout,
+            "sndbuf" : sndbuf,
+            "accuracy_weight" : accuracy_weight,
+            "age_weight" : age_weight,
+            "novelty_weight" : novelty_weight,
+            "cell" : cell,
+            "merge_window" : merge_window}
+
+
+async def main(config):
+    dst     = config["dst"]
+    port    = config["port"]
+    zmq_url = config["zmq"]
+
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    wake = asyncio.Event()
+    def shutdown():
+        signal_handler.KEEP_PROCESSING = False
+        stop.set()
+        wake.set()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, shutdown)
+
+    uplink = UplinkConnection(dst, port, config["keepalive"],
+            config["user_timeout"], config["sndbuf"])
+    outbox = Outbox(config["outbox"], config["outbox_size"] << 20)
+    scheduler = DetectionScheduler(outbox, config["accuracy_weight"],
+            config["age_weight"], config["novelty_weight"],
+            config["cell"], config["merge_window"])
+    budget = UplinkBudget(config["uplink_budget"],
+            config["uplink_rate"] * 1000)
+    window = UplinkWindow(config["window"], estimator=budget.estimator)
+    release = partial(release_detection, scheduler, config["followup"])
+    latency = AlertLatency()
+
+    index = TelemetryIndex()
+
+    context = zmq.asyncio.Context()
+    alert_task = asyncio.create_task(process_queue(context, zmq_url,
+            scheduler, index, config["tel_timeout"], wake, latency))
+
+    while not stop.is_set():
+        try:
+            #print("Attempting to connect!")
+            fireDetector_logger.info("Attempting to connect!")
+            drone_sock = await uplink.connect()
+
+            # Asked on every connection: a timeout or reset during the
+            # HELLO raises and is retried, it does not mean an old GCS
+            version = None
+            if not config["legacy"]:
+                version = await client_handshake_async(drone_sock)
+                if version is None:
+                    # Old GCS: it closes the connection on the HELLO
+                    fireDetector_logger.info('GCS does not support the framed protocol, using legacy')
+                    drone_sock = await uplink.connect()
+                else:
+                    fireDetector_logger.info(f'Framed protocol v{version}')
+            uplink.established()
+
+            if version is None:
+                # Legacy has no sequence numbers to resend under; what
+                # was in flight goes back to the outbox
+                resend = window.clear()
+                if resend:
+                    fireDetector_logger.info(f'Requeueing {len(resend)} unacknowledged detections')
+                for seq, detection in resend:
+                    await asyncio.to_thread(scheduler.requeue,
+                            detection.outbox_id, detection.merged)
+                await send_legacy_loop(drone_sock, scheduler, wake, stop,
+                        latency)
+            else:
+                await send_pipelined(drone_sock, scheduler, window, wake,
+                        stop, budget, version, latency, release)
+        except OSError as e:
+            # Any link failure: fresh socket after a backoff; the
+            # outbox and the window keep what was not acknowledged
+            uplink.lost(e)
+            await uplink.backoff(stop)
+
+    uplink.close()
+
+    #print("Socket loop closed")
+    fireDetector_logger.info("Socket loop closed")
+    alert_task.cancel()
+    await asyncio.gather(alert_task, return_exceptions=True)
+    # The SUB socket was closed on this thread, so nothing blocks the
+    # context from terminating
+    context.term()
+    index.close()
+    outbox.close()
+    fireDetector_logger.info(f'Uplink: {json.dumps(window.stats())}')
+    fireDetector_logger.info(f'Outbox: {json.dumps(outbox.stats())}')
+    fireDetector_logger.info(f'Scheduler: {json.dumps(scheduler.stats())}')
+    fireDetector_logger.info(f'Budget: {json.dumps(budget.stats())}')
+    fireDetector_logger.info(f'Connection: {json.dumps(uplink.stats())}')
+    fireDetector_logger.info(f'Latency: {json.dumps(latency.stats())}')
+    fireDetector_logger.info(f'Telemetry: {json.dumps(index.stats())}')
 
 
 if __name__ == '__main__':
     try:
-        config  = get_params()
-        dst     = config["dst"]
-        port    = config["port"]
-        zmq_url = config["zmq"]
-
-        drone_sock = socket.socket(family=socket.AF_INET, 
-                type=socket.SOCK_STREAM)
-        done = False
-        queue= Queue()
-
-        context = zmq.Context()
-        alert_thread = Thread(target=process_queue, args=(context,zmq_url,queue,))
-        alert_thread.start()
-
-        cnt = 0
-            
-        while not done:
-            try:
-                #print("Attempting to connect!")
-                fireDetector_logger.info("Attempting to connect!")
-                drone_sock.connect((dst, port))
-
-                while signal_handler.KEEP_PROCESSING:
-                    try:
-                        # Queue updated with new detection
-                        detection = queue.get(block=True, timeout=1)
-                        if detection is not None:
-                            cnt += 1
-                            det_data = detection.get_msg() 
-
-                            # Detection id extracted
-                            detection_id    = det_data['uuid']
-
-                            # Detection size sent 
-                            det_json = json.dumps(det_data)
-                            det_size = len(det_json)
-                            det_info = f'{detection_id},{det_size}'
-                            
-                            drone_sock.send(det_info.encode('utf-8'))
-                            ack = drone_sock.recv(1024)
-
-                            drone_sock.sendall(det_json.encode('utf-8'))
-
-                            ack = drone_sock.recv(1024)
-                            #print(f'Count: {cnt}\t ACK: {ack}')
-                            fireDetector_logger.info(f'Count: {cnt}\t ACK: {ack}')
-
-                        else:
-                            #print('Queue is empty.')
-                            fireDetector_logger.info('Queue is empty.')
-                            time.sleep(1)
-
-
-                    except Empty:
-                        time.sleep(0.5)
-            except ConnectionRefusedError:
-                time.sleep(1)
-                if not signal_handler.KEEP_PROCESSING:
-                    done = True
-                
-            #except ConnectionResetError:
-               # drone_sock.close()
-               #drone_sock = socket.socket(family=socket.AF_INET, type=socket.SOCK_STREAM)
-
-               # time.sleep(1)
-               #if not signal_handler.KEEP_PROCESSING:
-               #done = True
-            except FileNotFoundError:
-                done = True
-            except OSError:
-                #print('Error: Exiting program.')
-                fireDetector_logger.info('Error: Exiting program.')
-                done = True
-
-        #print("Socket loop closed")
-        fireDetector_logger.info("Socket loop closed")
-        context.destroy()
-        alert_thread.join()
-        drone_sock.close()
-
+        asyncio.run(main(get_params()))
 
     except KeyboardInterrupt:
         #print('Exiting program!')
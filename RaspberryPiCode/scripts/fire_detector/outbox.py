@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: outbox.py
+# Date: 10/17/2026
+# Description: Disk-backed store-and-forward outbox for detections waiting
+#              on the uplink. Records are appended to rotating segment
+#              files; a compact append-only index tracks which are still
+#              pending, so a restart resumes where it stopped and memory
+#              stays flat however long the link is down.
+# Version: 1.0
+# Version: 1.1 - Entry flags and demotion for follow-up frames (10/17/2026)
+# Version: 1.2 - Streams images in and out without holding them (10/17/2026)
+# Version: 1.3 - Caller-defined ordering and claiming of entries (10/17/2026)
+# Version: 1.4 - get() skips corrupt entries instead of giving up (10/17/2026)
+# Version: 1.5 - Removed the unused locate() (10/17/2026)
+###############################################################################
+import os
+import time
+import zlib
+import heapq
+import struct
+import logging
+from queue import Empty
+from threading import Condition
+from threading import Timer
+
+fireDetector_logger = logging.getLogger('fire_detector')
+
+# kind, entry id, priority, segment, offset, meta length, image length, crc32,
+# flags
+INDEX_ENTRY = struct.Struct('!BIdIIIIIB')
+ADD  = 1
+DONE = 2
+
+INDEX_FILE = 'index'
+SEGMENT_FMT = 'seg-{:08d}.log'
+
+# Copy and checksum buffer
+CHUNK = 256 << 10
+
+
+class OutboxEntry:
+    __slots__ = ('entry_id', 'priority', 'segment', 'offset', 'meta_len',
+            'image_len', 'crc', 'flags', 'in_flight', 'verified')
+
+    def __init__(self, entry_id, priority, segment, offset, meta_len,
+            image_len, crc, flags=0):
+        self.entry_id = entry_id
+        self.priority = priority
+        self.segment = segment
+        self.offset = offset
+        self.meta_len = meta_len
+        self.image_len = image_len
+        self.crc = crc
+        self.flags = flags
+        self.in_flight = False
+        # Written by this process, so its checksum need not be checked
+        self.verified = False
+
+    @property
+    def size(self):
+        return self.meta_len + self.image_len
+
+    def pack(self, kind=ADD):
+        return INDEX_ENTRY.pack(kind, self.entry_id, self.priority,
+                self.segment, self.offset, self.meta_len, self.image_len,
+                self.crc, self.flags)
+
+
+class Outbox:
+    def __init__(self, directory, max_bytes=512 << 20,
+            segment_bytes=8 << 20, sync_interval=0.5, sync_records=16):
+        """Entries are only forgotten once done() is called for them,
+        i.e. once the GCS acknowledged them."""
+        self._dir = directory
+        self._max_bytes = max_bytes
+        self._segment_bytes = segment_bytes
+        self._sync_interval = sync_interval
+        self._sync_records = sync_records
+        self._cond = Condition()
+
+        self._entries = {}
+        self._heap = []
+        self._live = {}
+        self._live_bytes = 0
+        self._next_id = 1
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._index_records = 0
+        self._timer = None
+        self.evicted = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+        # Always start a fresh segment; never append behind old data
+        segments = [int(name[4:12]) for name in os.listdir(directory)
+                if name.startswith('seg-')]
+        self._open_segment(max(segments, default=0) + 1)
+        self._index = open(os.path.join(directory, INDEX_FILE), 'ab')
+        self._compact_segments()
+        self._disk_bytes = sum(os.path.getsize(os.path.join(directory, name))
+                for name in os.listdir(directory) if name.startswith('seg-'))
+
+        if self._entries:
+            fireDetector_logger.info(f'Outbox: resuming {len(self._entries)} '
+                    f'pending detections ({self._live_bytes} bytes)')
+
+    def _segment_path(self, segment):
+        return os.path.join(self._dir, SEGMENT_FMT.format(segment))
+
+    def _load(self):
+        path = os.path.join(self._dir, INDEX_FILE)
+        if not os.path.exists(path):
+            return
+        with open(path, 'r+b') as fp:
+            data = fp.read()
+            # A torn entry at the end is a write that never completed
+            whole = len(data) - len(data) % INDEX_ENTRY.size
+            if whole != len(data):
+                fp.truncate(whole)
+
+        sizes = {}
+        for pos in range(0, whole, INDEX_ENTRY.size):
+            kind, entry_id, *fields = INDEX_ENTRY.unpack_from(data, pos)
+            self._index_records += 1
+            self._next_id = max(self._next_id, entry_id + 1)
+            if kind == DONE:
+                self._entries.pop(entry_id, None)
+                continue
+            entry = OutboxEntry(entry_id, *fields)
+            if entry.segment not in sizes:
+                try:
+                    sizes[entry.segment] = os.path.getsize(
+                            self._segment_path(entry.segment))
+                except FileNotFoundError:
+                    sizes[entry.segment] = 0
+            # Indexed but the data never reached the card
+            if entry.offset + entry.size <= sizes[entry.segment]:
+                self._entries[entry_id] = entry
+
+        for entry in self._entries.values():
+            self._track(entry)
+
+    def _track(self, entry):
+        self._live[entry.segment] = self._live.get(entry.segment, 0) + 1
+        self._live_bytes += entry.size
+        heapq.heappush(self._heap, (-entry.priority, entry.entry_id))
+
+    def _open_segment(self, segment):
+        self._segment = segment
+        self._seg_fp = open(self._segment_path(segment), 'ab')
+        self._live.setdefault(segment, 0)
+
+    def _compact_segments(self):
+        """Deletes segments with nothing pending, and rewrites the index
+        once it is mostly DONE records."""
+        for name in os.listdir(self._dir):
+            if not name.startswith('seg-'):
+                continue
+            segment = int(name[4:12])
+            if segment != self._segment and not self._live.get(segment):
+                path = os.path.join(self._dir, name)
+                if hasattr(self, '_disk_bytes'):
+                    self._disk_bytes -= os.path.getsize(path)
+                os.remove(path)
+                self._live.pop(segment, None)
+
+        if self._index_records > 64 and \
+                self._index_records > 4 * len(self._entries):
+            tmp = os.path.join(self._dir, INDEX_FILE + '.tmp')
+            with open(tmp, 'wb') as fp:
+                for entry in sorted(self._entries.values(),
+                        key=lambda e: e.entry_id):
+                    fp.write(entry.pack())
+                fp.flush()
+                os.fsync(fp.fileno())
+            self._index.close()
+            os.rename(tmp, os.path.join(self._dir, INDEX_FILE))
+            self._index = open(os.path.join(self._dir, INDEX_FILE), 'ab')
+            self._index_records = len(self._entries)
+
+    def _sync(self, force=False):
+        if self._unsynced == 0:
+            return
+        if not force and self._unsynced < self._sync_records and \
+                time.monotonic() - self._last_sync < self._sync_interval:
+            return
+        # Data first, so a synced index entry never points past it
+        self._seg_fp.flush()
+        os.fsync(self._seg_fp.fileno())
+        self._index.flush()
+        os.fsync(self._index.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _sync_later(self):
+        """Bounds how long a batched write can sit unsynced."""
+        if self._unsynced and self._timer is None:
+            self._timer = Timer(self._sync_interval, self._timed_sync)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timed_sync(self):
+        with self._cond:
+            self._timer = None
+            if not self._seg_fp.closed:
+                self._sync(force=True)
+
+    def _forget(self, entry):
+        del self._entries[entry.entry_id]
+        self._index.write(entry.pack(DONE))
+        self._index_records += 1
+        self._unsynced += 1
+        self._live[entry.segment] -= 1
+        self._live_bytes -= entry.size
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            # Drop the stale heap slots evicted entries left behind
+            self._heap = [(-e.priority, e.entry_id)
+                    for e in self._entries.values() if not e.in_flight]
+            heapq.heapify(self._heap)
+        if self._live[entry.segment] == 0 and entry.segment != self._segment:
+            self._compact_segments()
+
+    def _evict_for(self, size, priority):
+        """Drops the lowest-priority entries not already in flight until
+        size more bytes fit. False if the new entry is itself the lowest."""
+        while self._live_bytes + size > self._max_bytes:
+            victims = [e for e in self._entries.values() if not e.in_flight]
+            if not victims:
+                return False
+            victim = min(victims, key=lambda e: (e.priority, -e.entry_id))
+            if victim.priority > priority:
+                return False
+            fireDetector_logger.info(f'Outbox full: evicting entry '
+                    f'{victim.entry_id} (priority {victim.priority:.1f})')
+            self._forget(victim)
+            self.evicted += 1
+        return True
+
+    def _rotate(self, size):
+        if self._seg_fp.tell() + size > self._segment_bytes and \
+                self._seg_fp.tell() > 0:
+            self._sync(force=True)
+            self._seg_fp.close()
+            finished = self._segment
+            self._open_segment(finished + 1)
+            if self._live.get(finished) == 0:
+                self._compact_segments()
+
+    def _append(self, meta, image):
+        """Writes a record to the active segment, rotating it when full.
+        Returns (segment, offset)."""
+        size = len(meta) + len(image)
+        self._rotate(size)
+        offset = self._seg_fp.tell()
+        self._seg_fp.write(meta)
+        self._seg_fp.write(image)
+        self._disk_bytes += size
+        return self._segment, offset
+
+    def _append_file(self, meta, fp, image_len):
+        """_append() for an image read from fp a chunk at a time.
+        Returns (segment, offset, crc)."""
+        self._rotate(len(meta) + image_len)
+        offset = self._seg_fp.tell()
+        self._seg_fp.write(meta)
+        crc = zlib.crc32(meta)
+        buf = bytearray(min(CHUNK, max(1, image_len)))
+        view = memoryview(buf)
+        copied = 0
+        while copied < image_len:
+            n = fp.readinto(view[:image_len - copied])
+            if not n:
+                # The file shrank under us; keep the segment consistent
+                self._seg_fp.truncate(offset)
+                self._seg_fp.seek(offset)
+                raise OSError(f'short read: {copied} of {image_len} bytes')
+            self._seg_fp.write(view[:n])
+            crc = zlib.crc32(view[:n], crc)
+            copied += n
+        self._disk_bytes += len(meta) + image_len
+        return self._segment, offset, crc
+
+    def _relocate(self):
+        """Evicted entries leave holes in older segments. Once the holes
+        push the disk use over the cap, copy the live records out of the
+        emptiest segment so it can be deleted."""
+        while self._disk_bytes > self._max_bytes + self._segment_bytes:
+            live_bytes = {}
+            for entry in self._entries.values():
+                if entry.segment != self._segment:
+                    live_bytes[entry.segment] = \
+                            live_bytes.get(entry.segment, 0) + entry.size
+            candidates = [seg for seg in self._live if seg != self._segment]
+            if not candidates:
+                return
+            victim = min(candidates, key=lambda seg: live_bytes.get(seg, 0))
+
+            for entry in [e for e in self._entries.values()
+                    if e.segment == victim]:
+                meta, image = self._read(entry)
+                if meta is None:
+                    self._forget(entry)
+                    continue
+                segment, offset = self._append(meta, image)
+                self._live[entry.segment] -= 1
+                entry.segment, entry.offset = segment, offset
+                self._live[segment] += 1
+                self._index.write(entry.pack())
+                self._index_records += 1
+
+            # The copies must be durable before the original goes
+            self._unsynced += 1
+            self._sync(force=True)
+            self._compact_segments()
+
+    def put(self, priority, meta, image, flags=0):
+        """Appends one detection. Higher priority is sent first and
+        evicted last."""
+        size = len(meta) + len(image)
+        with self._cond:
+            if not self._evict_for(size, priority):
+                fireDetector_logger.info(f'Outbox full: dropping new '
+                        f'detection (priority {priority:.1f})')
+                self.evicted += 1
+                return None
+
+            segment, offset = self._append(meta, image)
+            crc = zlib.crc32(image, zlib.crc32(meta))
+            return self._add(OutboxEntry(self._next_id, priority, segment,
+                    offset, len(meta), len(image), crc, flags))
+
+    def put_file(self, priority, meta, path, flags=0):
+        """put() with the image copied from a file in chunks, so it is
+        never held in memory whole."""
+        with open(path, 'rb') as fp:
+            image_len = os.fstat(fp.fileno()).st_size
+            size = len(meta) + image_len
+            with self._cond:
+                if not self._evict_for(size, priority):
+                    fireDetector_logger.info(f'Outbox full: dropping new '
+                            f'detection (priority {priority:.1f})')
+                    self.evicted += 1
+                    return None
+
+                segment, offset, crc = self._append_file(meta, fp, image_len)
+                return self._add(OutboxEntry(self._next_id, priority,
+                        segment, offset, len(meta), image_len, crc, flags))
+
+    def _add(self, entry):
+        entry.verified = True
+        self._next_id += 1
+        self._index.write(entry.pack())
+        self._index_records += 1
+        self._unsynced += 1
+        self._entries[entry.entry_id] = entry
+        self._track(entry)
+        self._relocate()
+        self._sync()
+        self._sync_later()
+        self._cond.notify()
+        return entry.entry_id
+
+    def get(self, block=True, timeout=None, min_priority=None, key=None):
+        """Highest-priority pending entry not already in flight, oldest
+        first on ties: (entry_id, meta, image length, flags). The image
+        itself stays on disk; see read_image() and open_image(). Entries
+        below min_priority are left for later. With key, the entry with
+        the largest key(entry) is taken instead. Raises queue.Empty."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if key is None:
+                    entry = self._next_entry(min_priority)
+                else:
+                    entry = max((e for e in self._entries.values()
+                            if not e.in_flight and (min_priority is None or
+                            e.priority >= min_priority)),
+                            key=key, default=None)
+                if entry is None:
+                    remaining = None if deadline is None else \
+                            deadline - time.monotonic()
+                    if not block or (remaining is not None and remaining <= 0):
+                        raise Empty
+                    self._cond.wait(remaining)
+                    continue
+
+                entry.in_flight = True
+                meta = self._verify(entry) if not entry.verified else \
+                        self._read_meta(entry)
+                if meta is not None:
+                    return entry.entry_id, meta, entry.image_len, entry.flags
+                # Corrupt; drop it and carry on with the next one
+                self._forget(entry)
+
+    def _next_entry(self, min_priority=None):
+        while self._heap:
+            priority, entry_id = self._heap[0]
+            entry = self._entries.get(entry_id)
+            if entry is None or entry.in_flight or \
+                    -priority != entry.priority:
+                heapq.heappop(self._heap)
+                continue
+            if min_priority is not None and entry.priority < min_priority:
+                return None
+            heapq.heappop(self._heap)
+            return entry
+        return None
+
+    def _open(self, entry):
+        if entry.segment == self._segment:
+            # Nothing still buffered may be missing from what is read back
+            self._seg_fp.flush()
+        fp = open(self._segment_path(entry.segment), 'rb')
+        fp.seek(entry.offset)
+        return fp
+
+    def _verify(self, entry):
+        """Returns the meta of an entry found on disk at startup once its
+        checksum matches, reading the image a chunk at a time; None if it
+        is corrupt."""
+        with self._open(entry) as fp:
+            meta = fp.read(entry.meta_len)
+            crc = zlib.crc32(meta)
+            buf = bytearray(min(CHUNK, max(1, entry.image_len)))
+            view = memoryview(buf)
+            remaining = entry.image_len
+            while remaining:
+                n = fp.readinto(view[:remaining])
+                if not n:
+                    break
+                crc = zlib.crc32(view[:n], crc)
+                remaining -= n
+        if remaining or crc != entry.crc:
+            fireDetector_logger.info(f'Outbox: entry {entry.entry_id} is '
+                    f'corrupt, dropping it')
+            return None
+        entry.verified = True
+        return meta
+
+    def _read_meta(self, entry):
+        with self._open(entry) as fp:
+            return fp.read(entry.meta_len)
+
+    def _read(self, entry):
+        with self._open(entry) as fp:
+            meta = fp.read(entry.meta_len)
+            image = fp.read(entry.image_len)
+        if zlib.crc32(image, zlib.crc32(meta)) != entry.crc:
+            fireDetector_logger.info(f'Outbox: entry {entry.entry_id} is '
+                    f'corrupt, dropping it')
+            return None, None
+        return meta, image
+
+    def read_image(self, entry_id):
+        """The image bytes of a pending entry."""
+        with self._cond:
+            entry = self._entries[entry_id]
+            with self._open(entry) as fp:
+                fp.seek(entry.meta_len, os.SEEK_CUR)
+                return fp.read(entry.image_len)
+
+    def open_image(self, entry_id):
+        """(file, offset, length) of a pending entry's image, for
+        socket.sendfile(). The caller closes the file; it stays readable
+        even if compaction moves the entry meanwhile."""
+        with self._cond:
+            entry = self._entries[entry_id]
+            fp = self._open(entry)
+            return fp, entry.offset + entry.meta_len, entry.image_len
+
+    def done(self, entry_id):
+        """The GCS has the entry; it will not be sent again."""
+        with self._cond:
+            entry = self._entries.get(entry_id)
+            if entry is not None:
+                self._forget(entry)
+                self._sync()
+                self._sync_later()
+
+    def demote(self, entry_id, priority, flags):
+        """Keeps an acknowledged entry for another, lower-priority send
+        with new flags."""
+        with self._cond:
+            entry = self._entries.get(entry_id)
+            if entry is None:
+                return
+            entry.priority = priority
+            entry.flags = flags
+            entry.in_flight = False
+            self._index.write(entry.pack())
+            self._index_records += 1
+            self._unsynced += 1
+            heapq.heappush(self._heap, (-priority, entry_id))
+            self._sync()
+            self._sync_later()
+            self._cond.notify()
+
+    def claim(self, entry_id, flags=None):
+        """Marks a pending entry in flight without reading it, e.g. when
+        another entry is sent on its behalf. False if it is gone, already
+        in flight or, when flags is given, has other flags."""
+        with self._cond:
+            entry = self._entries.get(entry_id)
+            if entry is None or entry.in_flight or \
+                    (flags is not None and entry.flags != flags):
+                return False
+            entry.in_flight = True
+            return True
+
+    def pending(self):
+        """(entry_id, meta, flags) of every pending entry."""
+        with self._cond:
+            return [(entry.entry_id, self._read_meta(entry), entry.flags)
+                    for entry in list(self._entries.values())]
+
+    def requeue(self, entry_id):
+        """Makes an in-flight entry eligible for get() again."""
+        with self._cond:
+            entry = self._entries.get(entry_id)
+            if entry is not None and entry.in_flight:
+                entry.in_flight = False
+                heapq.heappush(self._heap, (-entry.priority, entry_id))
+                self._cond.notify()
+
+    def qsize(self):
+        return len(self._entries)
+
+    def __contains__(self, entry_id):
+        return entry_id in self._entries
+
+    def stats(self):
+        return {"pending": len(self._entries), "bytes": self._live_bytes,
+                "disk_bytes": self._disk_bytes,
+                "segments": len(self._live), "evicted": self.evicted}
+
+    def close(self):
+        with self._cond:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._sync(force=True)
+            self._seg_fp.close()
+            self._index.close()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: telemetry_index.py
+# Date: 10/17/2026
+# Description: In-memory index of the telemetry files written by the image
+#              scraper, keyed by image uuid and fed by watchdog events, so a
+#              detection waits on a condition rather than polling the disk.
+# Version: 1.0
+# Version: 1.1 - Awaitable lookup for the asyncio pipeline (10/17/2026)
+# Version: 1.2 - Index files renamed in from outside the directory (10/17/2026)
+# Version: 1.3 - get_async() does its disk reads on a worker thread (10/17/2026)
+# Version: 1.4 - Removed the blocking get() (10/17/2026)
+###############################################################################
+import os
+import json
+import asyncio
+import logging
+from collections import OrderedDict
+from threading import Lock
+from json.decoder import JSONDecodeError
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+
+fireDetector_logger = logging.getLogger('fire_detector')
+
+
+def read_telemetry(path):
+    """Returns the parsed telemetry file, or None while it is missing or
+    only partly written."""
+    try:
+        with open(path) as js:
+            return json.load(js)
+    except (FileNotFoundError, JSONDecodeError):
+        return None
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class TelemetryIndex(FileSystemEventHandler):
+    def __init__(self, capacity=1024):
+        """capacity bounds the telemetry held for images that never raise
+        an alert; the oldest entries go first."""
+        self._entries = OrderedDict()
+        self._capacity = capacity
+        self._lock = Lock()
+        # key -> [(loop, future)] of get_async() calls waiting for it
+        self._waiters = {}
+        self._watched = set()
+        self._watch_lock = Lock()
+        self._observer = Observer()
+        self._observer.start()
+        self.hits = 0
+        self.waits = 0
+        self.timeouts = 0
+
+        super().__init__()
+
+    def watch(self, directory):
+        """Start indexing a telemetry directory. Safe to call repeatedly."""
+        directory = os.path.abspath(directory)
+        with self._watch_lock:
+            if directory in self._watched or not os.path.isdir(directory):
+                return
+            self._observer.schedule(self, directory, recursive=False)
+            fireDetector_logger.info(f'Indexing telemetry in {directory}')
+
+            # Files written before the watch was in place
+            for name in os.listdir(directory):
+                self._add(os.path.join(directory, name))
+            # Only now, so a concurrent get_async() does not skip ahead
+            # of the scan
+            self._watched.add(directory)
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        # A file renamed in from elsewhere arrives as "created", complete
+        if event.event_type in ("created", "modified", "closed"):
+            self._add(event.src_path)
+        elif event.event_type == "moved":
+            self._add(event.dest_path)
+
+    def _add(self, path):
+        data = read_telemetry(path)
+        if data is None:
+            # Created but not yet written; the close event follows
+            return
+        with self._lock:
+            self._entries[os.path.basename(path)] = data
+            self._entries.move_to_end(os.path.basename(path))
+            while len(self._entries) > self._capacity:
+                self._entries.popitem(last=False)
+            waiters = self._waiters.pop(os.path.basename(path), ())
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    async def get_async(self, tel_path, timeout=5.0):
+        """Returns the telemetry for tel_path, waiting up to timeout
+        seconds for it to be written, or None. Waits on the event loop,
+        not a thread."""
+        key = os.path.basename(tel_path)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            data = self._entries.pop(key, None)
+            if data is None:
+                self._waiters.setdefault(key, []).append((loop, future))
+        if data is not None:
+            self.hits += 1
+            return data
+
+        self.waits += 1
+        try:
+            directory = os.path.dirname(tel_path)
+            if os.path.abspath(directory) not in self._watched:
+                # Lists and parses every file already there
+                await asyncio.to_thread(self.watch, directory)
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(key, [])
+                if (loop, future) in waiters:
+                    waiters.remove((loop, future))
+                    if not waiters:
+                        del self._waiters[key]
+                data = self._entries.pop(key, None)
+
+        if data is None:
+            # Last look in case the event was missed
+            data = await asyncio.to_thread(read_telemetry, tel_path)
+            if data is None:
+                self.timeouts += 1
+        return data
+
+    def stats(self):
+        return {"hits": self.hits, "waits": self.waits,
+                "timeouts": self.timeouts, "indexed": len(self._entries)}
+
+    def close(self):
+        self._observer.stop()
+        self._observer.join()
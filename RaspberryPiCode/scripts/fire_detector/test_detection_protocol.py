@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: test_detection_protocol.py
+# Date: 10/17/2026
+# Description: Unit tests for the binary detection framing.
+# Version: 1.0
+###############################################################################
+import socket
+import asyncio
+import unittest
+from detection_protocol import *
+
+
+class ReadFrameTest(unittest.TestCase):
+    def setUp(self):
+        self.reader, self.writer = socket.socketpair()
+        self.addCleanup(self.reader.close)
+        self.addCleanup(self.writer.close)
+
+    def test_round_trip(self):
+        self.writer.sendall(pack_header(DETECTION, seq=7, meta_len=4,
+                payload_len=5) + b'meta' + b'image')
+        self.assertEqual(read_frame(self.reader),
+                (VERSION, DETECTION, 7, b'meta', b'image'))
+
+    def test_oversized_payload_is_refused_before_reading(self):
+        self.writer.sendall(pack_header(DETECTION,
+                payload_len=MAX_PAYLOAD + 1) + b'rest')
+        with self.assertRaises(ProtocolError):
+            read_frame(self.reader)
+        self.assertEqual(self.reader.recv(16), b'rest')
+
+    def test_oversized_payload_is_refused_async(self):
+        self.writer.sendall(pack_header(DETECTION,
+                payload_len=MAX_PAYLOAD + 1) + b'rest')
+        self.reader.setblocking(False)
+
+        async def read():
+            with self.assertRaises(ProtocolError):
+                await read_frame_async(self.reader)
+        asyncio.run(read())
+        self.assertEqual(self.reader.recv(16), b'rest')
+
+
+if __name__ == '__main__':
+    unittest.main()
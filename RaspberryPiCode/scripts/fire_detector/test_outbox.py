@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: test_outbox.py
+# Date: 10/17/2026
+# Description: Unit tests for the disk-backed detection outbox.
+# Version: 1.0
+###############################################################################
+import tempfile
+import unittest
+from queue import Empty
+from outbox import Outbox
+
+
+class OutboxTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory(prefix='outbox-')
+        self.addCleanup(self._dir.cleanup)
+
+    def corrupt(self, outbox, entry_id):
+        entry = outbox._entries[entry_id]
+        path = outbox._segment_path(entry.segment)
+        with open(path, 'r+b') as fp:
+            fp.seek(entry.offset + entry.meta_len)
+            byte = fp.read(1)
+            fp.seek(entry.offset + entry.meta_len)
+            fp.write(bytes([byte[0] ^ 0xff]))
+
+    def test_corrupt_head_does_not_hide_the_rest(self):
+        outbox = Outbox(self._dir.name)
+        ids = [outbox.put(priority, b'meta%d' % priority, b'image' * 100)
+               for priority in (3, 2, 1)]
+        outbox.close()
+        # The highest-priority entry is the one get() tries first
+        self.corrupt(outbox, ids[0])
+
+        outbox = Outbox(self._dir.name)
+        self.addCleanup(outbox.close)
+        first = outbox.get(block=False)
+        second = outbox.get(block=False)
+        self.assertEqual([first[0], second[0]], ids[1:])
+        self.assertEqual(first[1], b'meta2')
+        self.assertEqual(outbox.qsize(), 2)
+        with self.assertRaises(Empty):
+            outbox.get(block=False)
+
+    def test_corrupt_entry_skipped_with_key(self):
+        outbox = Outbox(self._dir.name)
+        ids = [outbox.put(1, b'meta', b'image' * 100) for _ in range(3)]
+        outbox.close()
+        self.corrupt(outbox, ids[2])
+
+        outbox = Outbox(self._dir.name)
+        self.addCleanup(outbox.close)
+        taken = outbox.get(timeout=0, key=lambda e: e.entry_id)
+        self.assertEqual(taken[0], ids[1])
+        self.assertNotIn(ids[2], outbox)
+
+    def test_resume_after_restart(self):
+        outbox = Outbox(self._dir.name)
+        ids = [outbox.put(1, b'meta', b'image') for _ in range(3)]
+        outbox.done(ids[0])
+        outbox.close()
+
+        outbox = Outbox(self._dir.name)
+        self.addCleanup(outbox.close)
+        self.assertEqual(outbox.qsize(), 2)
+        self.assertEqual(outbox.get(block=False)[0], ids[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
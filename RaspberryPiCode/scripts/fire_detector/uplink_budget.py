@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: uplink_budget.py
+# Date: 10/17/2026
+# Description: Measures the throughput the uplink actually achieves and
+#              re-encodes detection images (resolution and JPEG quality)
+#              to fit a per-detection byte budget derived from it.
+# Version: 1.0
+###############################################################################
+import math
+import logging
+import numpy as np
+import cv2
+
+fireDetector_logger = logging.getLogger('fire_detector')
+
+QUALITIES = (85, 70, 55, 40)
+
+# Smallest long side worth sending
+MIN_SIDE = 320
+
+
+class ThroughputEstimator:
+    def __init__(self, alpha=0.3, initial=None):
+        """EWMA of delivered bytes per second, fed from ACK timing.
+        initial is assumed until the first measurement replaces it."""
+        self._alpha = alpha
+        self._measured = False
+        self.rate = initial
+
+    def sample(self, size, seconds):
+        if seconds <= 0 or size <= 0:
+            return
+        rate = size / seconds
+        if not self._measured:
+            self._measured = True
+            self.rate = rate
+        else:
+            self.rate += self._alpha * (rate - self.rate)
+
+
+def reduction(scale):
+    """Largest libjpeg decode reduction that stays at or above scale:
+    (factor, imread flag)."""
+    for factor, flag in ((8, cv2.IMREAD_REDUCED_COLOR_8),
+                         (4, cv2.IMREAD_REDUCED_COLOR_4),
+                         (2, cv2.IMREAD_REDUCED_COLOR_2)):
+        if scale <= 1.0 / factor:
+            return factor, flag
+    return 1, cv2.IMREAD_COLOR
+
+
+def encode_scaled(buf, scale, budget):
+    """Decodes at scale and returns the first JPEG quality that fits the
+    budget, else the smallest encoding, and the long side in pixels."""
+    factor, flag = reduction(scale)
+    image = cv2.imdecode(buf, flag)
+    if image is None:
+        return None, 0
+    rest = scale * factor
+    if rest < 1.0:
+        height, width = image.shape[:2]
+        image = cv2.resize(image, (max(1, round(width * rest)),
+                max(1, round(height * rest))), interpolation=cv2.INTER_AREA)
+
+    for quality in QUALITIES:
+        ok, out = cv2.imencode('.jpg', image,
+                [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            return None, 0
+        if len(out) <= budget:
+            break
+    return out.tobytes(), max(image.shape[:2])
+
+
+def reencode(jpeg, budget, attempts=4):
+    """Returns jpeg re-encoded to at most budget bytes, or the smallest
+    attempt when even that does not fit."""
+    buf = np.frombuffer(jpeg, dtype=np.uint8)
+    # Encoded size goes roughly with the pixel count, so each attempt
+    # rescales by the square root of how far the last one missed
+    scale = min(1.0, math.sqrt(budget / len(jpeg)))
+
+    best = jpeg
+    fit = None
+    for _ in range(attempts):
+        out, side = encode_scaled(buf, scale, budget)
+        if out is None:
+            break
+        if len(out) <= budget:
+            if fit is None or len(out) > len(fit):
+                fit = out
+            if len(out) > 0.7 * budget or scale >= 1.0:
+                break
+        elif len(out) < len(best):
+            best = out
+        if len(out) > budget and side < MIN_SIDE:
+            break
+        scale = min(1.0, scale * math.sqrt(0.85 * budget / len(out)))
+    return fit if fit is not None else best
+
+
+class UplinkBudget:
+    def __init__(self, seconds=2.0, initial_rate=None, estimator=None):
+        """seconds is the link time one detection may take; 0 disables
+        re-encoding. initial_rate (bytes/s) covers the first detections,
+        before any have been acknowledged."""
+        self._seconds = seconds
+        self.estimator = estimator or ThroughputEstimator(
+                initial=initial_rate)
+        self.reduced = 0
+        self.saved_bytes = 0
+
+    def budget(self):
+        if self._seconds <= 0 or self.estimator.rate is None:
+            return None
+        return int(self.estimator.rate * self._seconds)
+
+    def fit(self, jpeg):
+        """Returns (image bytes to send, True when they were reduced)."""
+        budget = self.budget()
+        if budget is None or len(jpeg) <= budget:
+            return jpeg, False
+        smaller = reencode(jpeg, budget)
+        if len(smaller) >= len(jpeg):
+            return jpeg, False
+        self.reduced += 1
+        self.saved_bytes += len(jpeg) - len(smaller)
+        fireDetector_logger.info(f'Re-encoded {len(jpeg)} -> {len(smaller)} '
+                f'bytes (budget {budget}, link {self.estimator.rate / 1000:.1f} kB/s)')
+        return smaller, True
+
+    def stats(self):
+        rate = self.estimator.rate
+        return {"link_kBps": None if rate is None else round(rate / 1000, 1),
+                "reduced": self.reduced, "saved_bytes": self.saved_bytes}
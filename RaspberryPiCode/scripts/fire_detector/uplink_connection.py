@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: uplink_connection.py
+# Date: 10/17/2026
+# Description: Connection manager for the TCP uplink to the GCS: a fresh,
+#              tuned socket per attempt, exponential backoff with jitter
+#              and counters for connects, failures and time offline.
+# Version: 1.0
+# Version: 1.1 - Non-blocking connect and backoff for asyncio (10/17/2026)
+###############################################################################
+import time
+import random
+import socket
+import asyncio
+import logging
+
+fireDetector_logger = logging.getLogger('fire_detector')
+
+
+class UplinkConnection:
+    def __init__(self, dst, port, keepalive=5, user_timeout=10,
+            sndbuf=256, connect_timeout=5, backoff_base=0.5, backoff_cap=30):
+        """keepalive and user_timeout are in seconds, sndbuf in KB (0
+        keeps the system default)."""
+        self._addr = (dst, port)
+        self._keepalive = keepalive
+        self._user_timeout = user_timeout
+        self._sndbuf = sndbuf
+        self._connect_timeout = connect_timeout
+        self._backoff_base = backoff_base
+        self._backoff_cap = backoff_cap
+        self._sock = None
+        self._failures = 0
+        self._offline_since = time.monotonic()
+
+        self.connects = 0
+        self.failures = 0
+        self.disconnects = 0
+        self.offline_s = 0.0
+
+    def _tune(self, sock):
+        # Headers and ACKs are small; do not let Nagle hold them back
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self._sndbuf:
+            # A short send queue keeps a new alert from waiting behind
+            # seconds of buffered image data on a slow link
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF,
+                    self._sndbuf * 1024)
+        if self._keepalive:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            if hasattr(socket, 'TCP_KEEPIDLE'):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE,
+                        self._keepalive)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL,
+                        max(1, self._keepalive // 2))
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3)
+        if self._user_timeout and hasattr(socket, 'TCP_USER_TIMEOUT'):
+            # Fail sends that go unacknowledged this long instead of
+            # retransmitting for the kernel default of ~15 minutes
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_USER_TIMEOUT,
+                    int(self._user_timeout * 1000))
+
+    async def connect(self):
+        """Returns a newly connected, non-blocking socket; raises OSError
+        on failure."""
+        self.close()
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(family=socket.AF_INET, type=socket.SOCK_STREAM)
+        try:
+            self._tune(sock)
+            sock.setblocking(False)
+            try:
+                await asyncio.wait_for(loop.sock_connect(sock, self._addr),
+                        self._connect_timeout)
+            except asyncio.TimeoutError:
+                raise socket.timeout('connect timed out') from None
+        except OSError:
+            sock.close()
+            self._failures += 1
+            self.failures += 1
+            raise
+        self._sock = sock
+        return sock
+
+    def established(self):
+        """The link is usable (connected and handshaken)."""
+        now = time.monotonic()
+        if self._offline_since is not None:
+            offline = now - self._offline_since
+            self.offline_s += offline
+            self._offline_since = None
+            fireDetector_logger.info(f'Connected to {self._addr[0]}:{self._addr[1]} '
+                    f'after {self._failures} failed attempts, offline {offline:.1f}s')
+        self._failures = 0
+        self.connects += 1
+
+    def lost(self, err=None):
+        """The link went down; closes the socket."""
+        if self._offline_since is None:
+            self._offline_since = time.monotonic()
+            self.disconnects += 1
+            fireDetector_logger.info(f'Connection lost: {err}')
+        self.close()
+
+    async def backoff(self, stop=None):
+        """Waits before the next attempt: full jitter over an exponential
+        ceiling, so a restarted GCS is not hit by every drone at once.
+        Returns early once the stop event is set."""
+        ceiling = min(self._backoff_cap,
+                self._backoff_base * 2 ** min(self._failures, 16))
+        delay = random.uniform(0, ceiling)
+        if stop is None:
+            await asyncio.sleep(delay)
+            return
+        try:
+            await asyncio.wait_for(stop.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def stats(self):
+        offline = self.offline_s
+        if self._offline_since is not None:
+            offline += time.monotonic() - self._offline_since
+        return {"connects": self.connects, "failures": self.failures,
+                "disconnects": self.disconnects,
+                "offline_s": round(offline, 1),
+                "online": self._offline_since is None}
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+###############################################################################
+# File: uplink_window.py
+# Date: 10/17/2026
+# Description: Sliding window of detections sent to the GCS but not yet
+#              acknowledged. ACKs are cumulative; whatever is still in the
+#              window after a reconnect is sent again.
+# Version: 1.0
+# Version: 1.1 - Callback for acknowledged detections (10/17/2026)
+# Version: 1.2 - Feeds a throughput estimator from ACK timing (10/17/2026)
+# Version: 1.3 - Non-blocking room check for the asyncio sender (10/17/2026)
+# Version: 1.4 - Emptied when the link falls back to legacy (10/17/2026)
+# Version: 1.5 - ack() returns what it released (10/17/2026)
+# Version: 1.6 - Removed the blocking waits (10/17/2026)
+###############################################################################
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class UplinkWindow:
+    def __init__(self, size=8, on_ack=None, estimator=None):
+        """on_ack is called with each detection the GCS acknowledged;
+        estimator.sample(bytes, seconds) with each ACK's delivery rate."""
+        self._size = max(1, size)
+        self._on_ack = on_ack
+        self._estimator = estimator
+        self._sent_at = {}
+        self._last_ack = 0.0
+        self._pending = OrderedDict()
+        self._lock = Lock()
+        self._next_seq = 1
+        self._connected = False
+        self.sent = 0
+        self.acked = 0
+        self.retransmitted = 0
+
+    def connected(self):
+        with self._lock:
+            self._connected = True
+
+    def connection_lost(self):
+        with self._lock:
+            self._connected = False
+
+    def is_connected(self):
+        return self._connected
+
+    def in_flight(self):
+        return len(self._pending)
+
+    def has_room(self):
+        return self._connected and len(self._pending) < self._size
+
+    def add(self, detection, size=0):
+        """Assigns the next sequence number to a detection about to be
+        sent; size is its length on the wire."""
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._pending[seq] = detection
+            self._sent_at[seq] = (time.monotonic(), size)
+            self.sent += 1
+            return seq
+
+    def ack(self, seq):
+        """Cumulative: everything up to and including seq was received.
+        Returns the detections it released."""
+        released = []
+        now = time.monotonic()
+        with self._lock:
+            started = None
+            size = 0
+            while self._pending:
+                first = next(iter(self._pending))
+                if first > seq:
+                    break
+                released.append(self._pending.pop(first))
+                sent_at, sent_size = self._sent_at.pop(first, (now, 0))
+                started = sent_at if started is None else started
+                size += sent_size
+                self.acked += 1
+
+        if released and self._estimator is not None:
+            # The link was busy from the later of the previous ACK and
+            # the first send this ACK covers
+            self._estimator.sample(size, now - max(started, self._last_ack))
+        if released:
+            self._last_ack = now
+        if self._on_ack is not None:
+            for detection in released:
+                self._on_ack(detection)
+        return released
+
+    def unacked(self):
+        """(seq, detection) pairs to resend after a reconnect, oldest
+        first."""
+        with self._lock:
+            pending = list(self._pending.items())
+            # Resent frames would skew the rate sample
+            self._sent_at.clear()
+        self.retransmitted += len(pending)
+        return pending
+
+    def clear(self):
+        """Empties the window for a sender that will not resend under
+        these sequence numbers; returns the (seq, detection) pairs that
+        were never acknowledged."""
+        with self._lock:
+            pending = list(self._pending.items())
+            self._pending.clear()
+            self._sent_at.clear()
+        return pending
+
+    def stats(self):
+        return {"sent": self.sent, "acked": self.acked,
+                "retransmitted": self.retransmitted,
+                "in_flight": len(self._pending)}
@@ -3,18 +3,42 @@
 # Date: 03/13/2023
 # Description: Object used to subscribe to the GeoTag zeromq message bus.
 # Version: 1.0
+# Version: 1.1 - Time-indexed telemetry history with interpolation (10/17/2026)
 ###########################################################################
 import zmq
 import json
+import time
+import numpy as np
 from zmq import ContextTerminated
-from threading import Thread 
+from threading import Thread
+
+FIELDS = ("time", "lat", "lon", "alt", "yaw", "pitch", "roll", "speed")
+
+# Attitude angles wrap at +/-180 degrees
+ANGLES = np.array([f in ("yaw", "pitch", "roll") for f in FIELDS])
 
 class GeoTagSub():
-    def __init__(self,topic="GeoTag", url="tcp://localhost:5555"):
+    def __init__(self,topic="GeoTag", url="tcp://localhost:5555",
+            capacity=256, extrapolate=1.0):
+        """Keeps the last capacity GeoTag samples, stamped with the local
+        time they arrived. get_data_at() extrapolates at most extrapolate
+        seconds past the newest sample."""
         self._subscribe = topic
         self._url = url
         self._context = zmq.Context()
         self._shutdown = False
+        self._thread = None
+        self._capacity = capacity
+        self._extrapolate = extrapolate
+
+        # Every sample is written at i and i + capacity, so the newest
+        # capacity samples are always one sorted, contiguous slice
+        self._stamps = np.zeros(2 * capacity)
+        self._values = np.zeros((2 * capacity, len(FIELDS)))
+        self._count = 0
+        # Odd while the subscriber thread is writing a sample
+        self._seq = 0
+
         self._data = {
                 "time": 0,
                 "lat" : 0.0,
@@ -29,6 +53,7 @@ class GeoTagSub():
         successful = False
         sub_thread = Thread(target=self.run)
         sub_thread.start()
+        self._thread = sub_thread
 
         return successful
 
@@ -38,11 +63,77 @@ class GeoTagSub():
         socket.subscribe(self._subscribe)
         try:
             while not self._shutdown:
+                # Wakes up now and then to notice close()
+                if not socket.poll(500):
+                    continue
                 topic, msg = socket.recv_multipart()
-                self._data = json.loads(msg.decode("utf-8"))
+                data = json.loads(msg.decode("utf-8"))
+                self._add(time.time(), data)
+                self._data = data
 
         except ContextTerminated as e:
             print(f'Shutting down socket queue')
+        finally:
+            socket.close(linger=0)
+
+    def _add(self, stamp, data):
+        slot = self._count % self._capacity
+        row = [data.get(f, 0.0) for f in FIELDS]
+        self._seq += 1
+        self._stamps[slot] = self._stamps[slot + self._capacity] = stamp
+        self._values[slot] = self._values[slot + self._capacity] = row
+        self._count += 1
+        self._seq += 1
+
+    def _lookup(self, when):
+        """Two samples around when and the fraction of the way from the
+        first to the second, or None before any sample arrived."""
+        count = self._count
+        if count == 0:
+            return None
+        n = min(count, self._capacity)
+        start = count % self._capacity if count > self._capacity else 0
+        stamps = self._stamps[start:start + n]
+        i = int(np.searchsorted(stamps, when))
+        if n == 1 or i == 0:
+            # Only one sample, or older than the history
+            return self._values[start].copy(), self._values[start].copy(), 0.0
+        i = min(i, n - 1)
+        t0, t1 = stamps[i - 1], stamps[i]
+        span = t1 - t0
+        if span <= 0:
+            return self._values[start + i].copy(), \
+                    self._values[start + i].copy(), 0.0
+        frac = min((when - t0) / span, 1.0 + self._extrapolate / span)
+        return self._values[start + i - 1].copy(), \
+                self._values[start + i].copy(), frac
+
+    def get_data_at(self, when):
+        """Telemetry at when (seconds since the epoch, e.g. a frame's
+        capture mtime), interpolated between the samples either side of it.
+        Safe to call from any thread without a lock."""
+        while True:
+            seq = self._seq
+            if seq & 1:
+                # Mid-write; let the subscriber thread finish
+                time.sleep(0)
+                continue
+            found = self._lookup(when)
+            if seq == self._seq:
+                break
+        if found is None:
+            return dict(self._data)
+
+        before, after, frac = found
+        delta = after - before
+        # Angles go the short way round, e.g. 179 -> -179 through 180
+        delta[ANGLES] = (delta[ANGLES] + 180.0) % 360.0 - 180.0
+        values = before + frac * delta
+        values[ANGLES] = (values[ANGLES] + 180.0) % 360.0 - 180.0
+
+        data = dict(zip(FIELDS, values.tolist()))
+        data["time"] = int(round(data["time"]))
+        return data
 
     def get_time_utc(self):
         return self._data["time"]
@@ -73,6 +164,8 @@ class GeoTagSub():
 
     def close(self):
         self._shutdown = True
+        if self._thread is not None:
+            self._thread.join()
         self._context.destroy(linger=0)
 
 
@@ -4,7 +4,10 @@
 # Description: Util functions used to geo-tag jpegs
 # Version: 1.0 - Baseline
 # Version: 1.1 - Remove boolean parameter from set_gps_loc (03/18/2023)
+# Version: 1.2 - In-memory geotagging and atomic file writes (10/17/2026)
 ###########################################################################
+import os
+import tempfile
 import pyexiv2
 import fractions
 from PIL import Image
@@ -31,10 +34,7 @@ def str_by_recursion(t, s=''):
 
     return str(t[0]) + str_by_recursion(t[1:])
 
-def set_gps_loc(file_name, lat, lng, alt, utc_time):
-    """
-        Adding GPS tag
-    """
+def _set_gps_tags(exiv_image, lat, lng, alt, utc_time):
     lat_deg = to_degree(lat, ["S", "N"])
     lng_deg = to_degree(lng, ["W", "E"])
 
@@ -47,9 +47,6 @@ def set_gps_loc(file_name, lat, lng, alt, utc_time):
 
     tel_time = datetime.utcfromtimestamp(int(utc_time/1000000))
 
-    exiv_image = pyexiv2.ImageMetadata(file_name)
-    exiv_image.read()
-
     exiv_image["Exif.Image.DateTime"] = tel_time
     exiv_image["Exif.Image.DateTimeOriginal"] = tel_time
     exiv_image["Exif.GPSInfo.GPSLatitude"] = exiv_lat
@@ -62,6 +59,39 @@ def set_gps_loc(file_name, lat, lng, alt, utc_time):
     exiv_image["Exif.GPSInfo.GPSMapDatum"] = "WGS-84"
     exiv_image["Exif.GPSInfo.GPSVersionID"] = '2 3 0 0'
     exiv_image["Exif.GPSInfo.GPSTimeStamp"] = fractions.Fraction(tel_time.hour,1), fractions.Fraction(tel_time.minute,1), fractions.Fraction(tel_time.second,1)
+
+def set_gps_loc(file_name, lat, lng, alt, utc_time):
+    """
+        Adding GPS tag
+    """
+    exiv_image = pyexiv2.ImageMetadata(file_name)
+    exiv_image.read()
+    _set_gps_tags(exiv_image, lat, lng, alt, utc_time)
     exiv_image.write(True)
 
+def set_gps_buffer(data, lat, lng, alt, utc_time):
+    """
+        Adding GPS tag to a JPEG held in memory; returns the tagged bytes
+    """
+    exiv_image = pyexiv2.ImageMetadata.from_buffer(data)
+    exiv_image.read()
+    _set_gps_tags(exiv_image, lat, lng, alt, utc_time)
+    exiv_image.write()
+    return exiv_image.buffer
 
+def write_atomic(path, data, tmp_dir, mtime=None):
+    """
+        Writes data to a file in tmp_dir and renames it to path, so readers
+        of path only ever see the complete file. tmp_dir must be on the
+        same filesystem as path.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(data)
+        if mtime is not None:
+            os.utime(tmp_path, (mtime, mtime))
+        os.rename(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -6,6 +6,8 @@
 #              to geo-tag the JPEG files.
 # Version: 1.0 - Baseline
 # Version: 1.1 - Removed boolean parameter from set_gps_loc (03/18/2023)
+# Version: 1.2 - Single-pass geotagging with atomic renames (10/17/2026)
+# Version: 1.3 - Tag with the telemetry at the frame's capture time (10/17/2026)
 ###########################################################################
 import time
 import sys
@@ -14,7 +16,6 @@ import os
 import getopt
 import json
 import uuid
-import shutil
 import time
 import logging
 import logging.handlers
@@ -67,23 +68,34 @@ class GeoTagFileHandler(FileSystemEventHandler):
                     dst_img = unique_name + ".jpg"
                     img_path = self._output_dir  + "/inprocessing/" + \
                                 dst_img
+                    tmp_dir = self._output_dir + "/.tmp"
+                    # One read of the source; the EXIF is set in memory
+                    with open(event.dest_path, 'rb') as fp:
+                        data = fp.read()
+                        mtime = os.fstat(fp.fileno()).st_mtime
+                    # The frame's mtime is when the camera wrote it
+                    geo_data = self._geo_tag_sub.get_data_at(mtime)
+
+                    # Telemetry goes first so it is in place by the time
+                    # anything acts on the image
+                    tel_path = self._output_dir + "/telemetry/" + \
+                                unique_name
+                    #print(f'Generating telemetry file {tel_path}')
+                    img_logger.info(f'Generating telemetry file: {tel_path}')
+                    write_atomic(tel_path,
+                            json.dumps(geo_data).encode("utf-8"), tmp_dir)
+
                    # print(f'Generating image file: {img_path}')
                     img_logger.info(f'Generating image file: {img_path}')
-                    shutil.copy2(event.dest_path,img_path)
-                    geo_data = self._geo_tag_sub.get_data()
-
-                    set_gps_loc(img_path,
+                    data = set_gps_buffer(data,
                             geo_data['lat'],
                             geo_data['lon'],
                             geo_data['alt'],
                             geo_data['time'])
+                    # Written beside the output and renamed in, so the
+                    # watchers downstream only ever see complete files
+                    write_atomic(img_path, data, tmp_dir, mtime)
 
-                    tel_path = self._output_dir + "/telemetry/" + \
-                                unique_name
-                    #print(f'Generating telemetry file {tel_path}')
-                    img_logger.info(f'Generating telemetry file: {tel_path}')
-                    with open(tel_path, 'w') as fp:
-                        fp.write(json.dumps(geo_data))
     def close(self):
         self._geo_tag_sub.close()
 
@@ -103,6 +115,8 @@ def create_output_dirs(path: str) -> str:
 
     os.makedirs(path +'/inprocessing', exist_ok=True)
     os.makedirs(path +'/telemetry', exist_ok=True)
+    # Staging area for write_atomic(); must share the filesystem
+    os.makedirs(path +'/.tmp', exist_ok=True)
 
     return path
 